@@ -0,0 +1,196 @@
+"""
+AiNiee 多智能体翻译系统 - 异步数据库管理器
+
+DatabaseManager 的异步镜像，用于高吞吐写入阶段：
+- asyncpg 连接池替代 psycopg2 (二进制协议 + 原生 asyncio)
+- AsyncElasticsearch 替代同步 ES 客户端
+- PostgreSQL 与 ElasticSearch 的独立写入通过 asyncio.gather 并发重叠
+
+仅覆盖批量热路径 (原子批量写入、轨迹批量写入、术语批量写入)，
+单条低频操作仍走同步的 DatabaseManager。
+"""
+
+import asyncio
+import datetime
+import logging
+from typing import Dict, List
+
+from ModuleFolders.Cache.DatabaseManager import (
+    DatabaseManager, _dump_json
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+try:
+    from elasticsearch import AsyncElasticsearch
+    from elasticsearch.helpers import async_bulk
+except ImportError:
+    AsyncElasticsearch = None
+    async_bulk = None
+
+
+class AsyncDatabaseManager:
+    """异步数据库管理器 - 单例模式"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(AsyncDatabaseManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, config=None):
+        if hasattr(self, 'initialized'):
+            return
+
+        self.pg_config = config or {
+            "host": "localhost",
+            "port": 5432,
+            "user": "admin",
+            "password": "password",
+            "database": "ainiee_db"
+        }
+        self.es_url = "http://localhost:9200"
+        self.pool = None
+        self.es = None
+        self.initialized = True
+
+    async def _ensure_pool(self):
+        """惰性建立 asyncpg 连接池与异步 ES 客户端"""
+        if asyncpg is None:
+            raise RuntimeError("asyncpg 未安装，无法使用异步数据库管理器")
+        if self.pool is None:
+            self.pool = await asyncpg.create_pool(min_size=2, max_size=32, **self.pg_config)
+        if self.es is None and AsyncElasticsearch is not None:
+            self.es = AsyncElasticsearch(self.es_url)
+        return self.pool
+
+    async def close(self):
+        """关闭连接池与 ES 客户端"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+        if self.es is not None:
+            await self.es.close()
+            self.es = None
+
+    # ==========================================
+    # 批量写入协程
+    # ==========================================
+
+    async def create_atoms_batch(self, doc_id: int, atoms: List[Dict]) -> List[int]:
+        """批量创建处理原子（参数结构与同步版一致）"""
+        if not atoms:
+            return []
+
+        await self._ensure_pool()
+        records = [(
+            doc_id,
+            atom.get('source_text', ''),
+            atom.get('position', idx),
+            atom.get('summary', ''),
+            _dump_json(atom.get('context_info', {}))
+        ) for idx, atom in enumerate(atoms)]
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch("""
+                    INSERT INTO processing_atoms
+                    (doc_id, source_text, position, summary, context_info)
+                    SELECT r.doc_id, r.source_text, r.position, r.summary, r.context_info::jsonb
+                    FROM unnest($1::int[], $2::text[], $3::int[], $4::text[], $5::text[])
+                        AS r(doc_id, source_text, position, summary, context_info)
+                    RETURNING atom_id;
+                """, *[list(col) for col in zip(*records)])
+        return [row['atom_id'] for row in rows]
+
+    async def add_trace_batch(self, traces: List[Dict]) -> List[int]:
+        """批量添加 Agent 轨迹（语义与同步版 add_trace_batch 一致）"""
+        if not traces:
+            return []
+
+        await self._ensure_pool()
+
+        last_translation_idx = {}
+        for idx, trace in enumerate(traces):
+            if trace.get('action_type') in DatabaseManager.TRANSLATION_ACTIONS:
+                last_translation_idx[trace.get('atom_id')] = idx
+
+        records = [(
+            trace.get('atom_id'),
+            trace.get('agent_role', 'Unknown'),
+            trace.get('action_type', 'unknown'),
+            trace.get('content'),
+            _dump_json(trace.get('quality_report') or {}),
+            _dump_json(trace.get('meta_data') or {}),
+            trace.get('input_tokens', 0),
+            trace.get('output_tokens', 0),
+            last_translation_idx.get(trace.get('atom_id')) == idx
+        ) for idx, trace in enumerate(traces)]
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if last_translation_idx:
+                    await conn.execute(
+                        "UPDATE agent_traces SET is_active = FALSE WHERE is_active = TRUE AND atom_id = ANY($1)",
+                        list(last_translation_idx.keys())
+                    )
+                rows = await conn.fetch("""
+                    INSERT INTO agent_traces
+                    (atom_id, agent_role, action_type, content, quality_report,
+                     meta_data, input_tokens, output_tokens, is_active)
+                    SELECT r.atom_id, r.agent_role, r.action_type, r.content, r.quality_report::jsonb,
+                           r.meta_data::jsonb, r.input_tokens, r.output_tokens, r.is_active
+                    FROM unnest($1::int[], $2::text[], $3::text[], $4::text[], $5::text[],
+                                $6::text[], $7::int[], $8::int[], $9::bool[])
+                        AS r(atom_id, agent_role, action_type, content, quality_report,
+                             meta_data, input_tokens, output_tokens, is_active)
+                    RETURNING trace_id;
+                """, *[list(col) for col in zip(*records)])
+        return [row['trace_id'] for row in rows]
+
+    async def upsert_terms_bulk(self, terms: List[Dict], chunk_size: int = 500) -> int:
+        """批量写入术语库（参数结构与同步版 upsert_terms_bulk 一致）"""
+        if not terms:
+            return 0
+        await self._ensure_pool()
+        if self.es is None or async_bulk is None:
+            return 0
+
+        try:
+            actions = []
+            for term in terms:
+                doc_id, doc = DatabaseManager._build_term_doc(**term)
+                actions.append({
+                    "_op_type": "index",
+                    "_index": "domain_lexicon",
+                    "_id": doc_id,
+                    "_source": doc
+                })
+            success, _ = await async_bulk(self.es, actions, chunk_size=chunk_size, request_timeout=60)
+            return success
+        except Exception as e:
+            logger.error("ES 异步术语批量更新失败: %s", e)
+            return 0
+
+    async def pipeline_insert(self, doc_id: int, atoms: List[Dict] = None,
+                              traces: List[Dict] = None, terms: List[Dict] = None):
+        """
+        并发执行一次导入阶段的全部独立写入
+
+        PostgreSQL (原子 + 轨迹) 与 ElasticSearch (术语) 互不依赖，
+        用 asyncio.gather 重叠网络等待
+
+        Returns:
+            (atom_ids, trace_ids, term_count)
+        """
+        results = await asyncio.gather(
+            self.create_atoms_batch(doc_id, atoms or []),
+            self.add_trace_batch(traces or []),
+            self.upsert_terms_bulk(terms or [])
+        )
+        return tuple(results)
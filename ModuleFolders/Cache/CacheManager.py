@@ -19,6 +19,21 @@ from ModuleFolders.Cache.CacheProject import (
 )
 
 
+# 项目快照使用 msgpack 编码：比 JSON 编码快数倍且体积更小，定时保存不再卡顿
+_MSGPACK_ENCODER = msgspec.msgpack.Encoder()
+_MSGPACK_DECODER = msgspec.msgpack.Decoder(CacheProject)
+
+
+def _pack(project: CacheProject) -> bytes:
+    """序列化项目快照为 msgpack 帧"""
+    return _MSGPACK_ENCODER.encode(project)
+
+
+def _unpack(data: bytes) -> CacheProject:
+    """从 msgpack 帧还原项目快照"""
+    return _MSGPACK_DECODER.decode(data)
+
+
 class CacheManager(Base):
     SAVE_INTERVAL = 8  # 缓存保存间隔（秒）
 
@@ -92,14 +107,14 @@ class CacheManager(Base):
         # 为每个项目创建独立的子目录
         project_dir = self._get_project_directory(self.save_to_file_require_path)
         cache_dir = os.path.join(project_dir, "cache")
-        path = os.path.join(cache_dir, "AinieeCacheData.json")
+        path = os.path.join(cache_dir, "AinieeCacheData.msgpack")
         # 定义临时文件路径，确保在同一文件系统下以支持原子性替换
         tmp_path = path + f".{os.getpid()}.tmp"
 
         with self.file_lock:
             try:
                 os.makedirs(cache_dir, exist_ok=True)
-                content_bytes = msgspec.json.encode(self.project)
+                content_bytes = _pack(self.project)
 
                 # 先将完整内容写入临时文件
                 with open(tmp_path, "wb") as writer:
@@ -109,6 +124,14 @@ class CacheManager(Base):
                 # 要么读到旧的完整文件，要么读到新的完整文件，绝不会读到一半。
                 os.replace(tmp_path, path)
 
+                # 清理旧格式的 JSON 快照，避免下次加载读到过期数据
+                legacy_path = os.path.join(cache_dir, "AinieeCacheData.json")
+                if os.path.exists(legacy_path):
+                    try:
+                        os.remove(legacy_path)
+                    except OSError:
+                        pass
+
                 # 写入项目整体翻译状态文件
                 if self.project and self.project.stats_data:
                     total_line = self.project.stats_data.total_line # 获取需翻译总行数
@@ -231,13 +254,22 @@ class CacheManager(Base):
         self.project = data
 
     # 从缓存文件读取数据
+    @staticmethod
+    def _find_cache_file(cache_dir: str) -> str:
+        """在 cache 目录下查找快照文件，优先新格式 msgpack，回退旧格式 JSON"""
+        for name in ("AinieeCacheData.msgpack", "AinieeCacheData.json"):
+            path = os.path.join(cache_dir, name)
+            if os.path.isfile(path):
+                return path
+        return ""
+
     def load_from_file(self, output_path: str) -> None:
         """从文件加载数据，支持项目独立目录"""
         # 首先尝试从旧路径加载（兼容性）
-        old_path = os.path.join(output_path, "cache", "AinieeCacheData.json")
-        
+        old_path = self._find_cache_file(os.path.join(output_path, "cache"))
+
         with self.file_lock:
-            if os.path.isfile(old_path):
+            if old_path:
                 # 加载旧项目
                 self.project = self.read_from_file(old_path)
                 self.info(f"从旧路径加载项目: {old_path}")
@@ -254,8 +286,8 @@ class CacheManager(Base):
                     for item in os.listdir(output_path):
                         project_dir = os.path.join(output_path, item)
                         if os.path.isdir(project_dir):
-                            cache_path = os.path.join(project_dir, "cache", "AinieeCacheData.json")
-                            if os.path.isfile(cache_path):
+                            cache_path = self._find_cache_file(os.path.join(project_dir, "cache"))
+                            if cache_path:
                                 self.project = self.read_from_file(cache_path)
                                 self.info(f"从项目目录加载: {project_dir}")
                                 # 只加载第一个找到的项目
@@ -265,6 +297,8 @@ class CacheManager(Base):
     def read_from_file(cls, cache_path) -> CacheProject:
         with open(cache_path, "rb") as reader:
             content_bytes = reader.read()
+        if cache_path.endswith(".msgpack"):
+            return _unpack(content_bytes)
         try:
             # 反序列化严格按照dataclass定义，如source_text这种非optional类型不能为None，否则反序列化失败
             return msgspec.json.decode(content_bytes, type=CacheProject)
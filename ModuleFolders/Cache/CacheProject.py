@@ -3,7 +3,7 @@ from dataclasses import dataclass, field
 from functools import cached_property
 from typing import Any
 
-from ModuleFolders.Cache.BaseCache import ExtraMixin, ThreadSafeCache
+from ModuleFolders.Cache.BaseCache import ExtraMixin, ThreadSafeCache, _get_fields
 from ModuleFolders.Cache.CacheFile import CacheFile
 
 
@@ -47,6 +47,15 @@ class CacheProjectStatistics(ThreadSafeCache):
     stage_progress_current: int = 0  # 当前阶段已完成的单位数
     stage_progress_total: int = 0  # 当前阶段总单位数
 
+    def snapshot(self) -> dict[str, Any]:
+        """锁内一次性浅拷贝全部统计字段
+
+        统计字段均为标量，浅拷贝即一致快照；
+        临界区只有 O(字段数) 的 getattr，格式化/发布由调用方在锁外完成
+        """
+        with self._lock:
+            return {f.name: getattr(self, f.name) for f in _get_fields(self.__class__)}
+
 
 @dataclass(repr=False)
 class CacheProject(ThreadSafeCache, ExtraMixin):
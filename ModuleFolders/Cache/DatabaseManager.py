@@ -10,13 +10,63 @@ AiNiee 多智能体翻译系统 - 数据库管理器
 """
 
 import psycopg2
-from psycopg2.extras import execute_values, Json, RealDictCursor
+from psycopg2.extras import execute_values, NamedTupleCursor
+from psycopg2.pool import ThreadedConnectionPool
 from elasticsearch import Elasticsearch
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
+from contextlib import contextmanager
+import io
 import json
+import logging
 import datetime
-import hashlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    def _dump_json(obj) -> str:
+        """序列化 JSON 字段 (orjson 比 stdlib 快数倍)"""
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _dump_json(obj) -> str:
+        """序列化 JSON 字段"""
+        return json.dumps(obj, ensure_ascii=False)
+
+try:
+    from pgvector.psycopg2 import register_vector
+except ImportError:
+    register_vector = None
+
+try:
+    from pgvector import HalfVector
+except ImportError:
+    HalfVector = None
+
+
+class _TxConnection:
+    """
+    事务作用域内的连接代理
+
+    屏蔽各方法内部的 commit/rollback，由 transaction() 在作用域结束时统一提交
+    """
+
+    def __init__(self, conn):
+        object.__setattr__(self, '_conn', conn)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        # 状态必须落在被代理的池化连接上，而不是作用域结束即丢弃的代理
+        setattr(self._conn, name, value)
 
 
 class DatabaseManager:
@@ -28,10 +78,14 @@ class DatabaseManager:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, config=None):
+    # 连接池容量：上限对齐翻译阶段 max_workers 的常见峰值
+    POOL_MIN_CONN = 2
+    POOL_MAX_CONN = 32
+
+    def __init__(self, config=None, max_connections: int = None):
         if hasattr(self, 'initialized'):
             return
-        
+
         # PostgreSQL 配置
         self.pg_config = config or {
             "host": "localhost",
@@ -40,23 +94,92 @@ class DatabaseManager:
             "password": "password",
             "dbname": "ainiee_db"
         }
-        
+
+        # PostgreSQL 连接池 (进程级，避免每次调用重建 TCP/认证握手)
+        self.pool = None
+        self.pool_max_conn = max_connections or self.POOL_MAX_CONN
+        try:
+            self.pool = ThreadedConnectionPool(
+                minconn=self.POOL_MIN_CONN, maxconn=self.pool_max_conn, **self.pg_config
+            )
+        except Exception as e:
+            logger.error("PostgreSQL 连接池初始化失败 (将在首次使用时重试): %s", e)
+
         # ElasticSearch 配置
         self.es_url = "http://localhost:9200"
         try:
             self.es = Elasticsearch(self.es_url)
         except:
             self.es = None
-            
+
+        # transaction() 作用域内固定使用的连接（按线程隔离）
+        self._tx_local = threading.local()
+
+        # 已注册 pgvector 适配器的连接（按 id(conn) 记录）：
+        # psycopg2 的连接是C类型，不能在实例上挂属性，
+        # 注册状态只能放在管理器侧；连接关闭归还时移除对应条目
+        self._vector_registered = set()
+
+        # 各连接上已 PREPARE 过的语句名（同样按 id(conn) 记录）
+        self._prepared_names: Dict[int, set] = {}
+
         self.initialized = True
 
-    def get_pg_connection(self):
-        """获取 PostgreSQL 连接"""
+    @contextmanager
+    def _conn(self):
+        """从连接池借出 PostgreSQL 连接，用完归还；事务作用域内复用固定连接"""
+        pinned = getattr(self._tx_local, 'conn', None)
+        if pinned is not None:
+            yield pinned
+            return
+        if self.pool is None:
+            try:
+                self.pool = ThreadedConnectionPool(
+                    minconn=self.POOL_MIN_CONN, maxconn=self.pool_max_conn, **self.pg_config
+                )
+            except Exception as e:
+                logger.error("PostgreSQL 连接失败: %s", e)
+                raise e
+        conn = self.pool.getconn()
+        if register_vector is not None and id(conn) not in self._vector_registered:
+            try:
+                register_vector(conn)
+            except Exception:
+                pass  # 数据库未装 pgvector 扩展时退化为文本字面量
+            self._vector_registered.add(id(conn))
         try:
-            return psycopg2.connect(**self.pg_config)
-        except Exception as e:
-            print(f"[DB] PostgreSQL 连接失败: {e}")
-            raise e
+            yield conn
+        finally:
+            if conn.closed:
+                # 连接销毁后 id 可能被复用，必须清掉旧条目
+                self._vector_registered.discard(id(conn))
+                self._prepared_names.pop(id(conn), None)
+            self.pool.putconn(conn, close=conn.closed)
+
+    @contextmanager
+    def transaction(self):
+        """
+        将多步写入合并为一个事务，整个作用域只 commit 一次
+
+        典型流程 create_document → create_atoms_batch → 多次 update/add_trace
+        原本每步各自 commit（每次都是一次 WAL fsync），包在本作用域内后
+        只在退出时提交一次；任一步抛出异常则整体回滚。
+
+        用法:
+            with db.transaction() as tx:
+                doc_id = tx.create_document(work_id, path)
+                tx.create_atoms_batch(doc_id, atoms)
+        """
+        with self._conn() as conn:
+            self._tx_local.conn = _TxConnection(conn)
+            try:
+                yield self
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._tx_local.conn = None
 
     # ==========================================
     # 项目管理 (Project Works)
@@ -80,32 +203,30 @@ class DatabaseManager:
         Returns:
             work_id: 项目ID
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            sql = """
-                INSERT INTO project_works 
-                (work_name, src_lang, tgt_lang, workflow_config, topic_info, translation_guide, prompt_templates)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING work_id;
-            """
-            cur.execute(sql, (
-                name, src_lang, tgt_lang, 
-                Json(workflow_config or {}),
-                Json(topic_info or {}),
-                Json(translation_guide or {}),
-                Json(prompt_templates or {})
-            ))
-            work_id = cur.fetchone()[0]
-            conn.commit()
-            print(f"[DB] 创建项目成功: work_id={work_id}, name={name}")
-            return work_id
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 创建项目失败: {e}")
-            return None
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                sql = """
+                    INSERT INTO project_works 
+                    (work_name, src_lang, tgt_lang, workflow_config, topic_info, translation_guide, prompt_templates)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    RETURNING work_id;
+                """
+                cur.execute(sql, (
+                    name, src_lang, tgt_lang, 
+                    _dump_json(workflow_config or {}),
+                    _dump_json(topic_info or {}),
+                    _dump_json(translation_guide or {}),
+                    _dump_json(prompt_templates or {})
+                ))
+                work_id = cur.fetchone()[0]
+                conn.commit()
+                logger.debug("创建项目成功: work_id=%s, name=%s", work_id, name)
+                return work_id
+            except Exception as e:
+                conn.rollback()
+                logger.error("创建项目失败: %s", e)
+                return None
 
     def update_project_topic_info(self, work_id: int, topic_info: Dict):
         """
@@ -115,20 +236,18 @@ class DatabaseManager:
             work_id: 项目ID
             topic_info: {domain, topic, summary, style}
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE project_works SET topic_info = %s WHERE work_id = %s",
-                (Json(topic_info), work_id)
-            )
-            conn.commit()
-            print(f"[DB] 更新项目主题知识: work_id={work_id}")
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新项目主题知识失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE project_works SET topic_info = %s WHERE work_id = %s",
+                    (_dump_json(topic_info), work_id)
+                )
+                conn.commit()
+                logger.debug("更新项目主题知识: work_id=%s", work_id)
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新项目主题知识失败: %s", e)
 
     def update_project_translation_guide(self, work_id: int, translation_guide: Dict):
         """
@@ -138,31 +257,26 @@ class DatabaseManager:
             work_id: 项目ID
             translation_guide: {style_requirements, fixed_translations, cultural_adaptation}
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE project_works SET translation_guide = %s WHERE work_id = %s",
-                (Json(translation_guide), work_id)
-            )
-            conn.commit()
-            print(f"[DB] 更新项目翻译指南: work_id={work_id}")
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新项目翻译指南失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE project_works SET translation_guide = %s WHERE work_id = %s",
+                    (_dump_json(translation_guide), work_id)
+                )
+                conn.commit()
+                logger.debug("更新项目翻译指南: work_id=%s", work_id)
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新项目翻译指南失败: %s", e)
 
     def get_project(self, work_id: int) -> Optional[Dict]:
         """获取项目信息"""
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
+        with self._conn() as conn:
+            cur = conn.cursor(cursor_factory=NamedTupleCursor)
             cur.execute("SELECT * FROM project_works WHERE work_id = %s", (work_id,))
             result = cur.fetchone()
-            return dict(result) if result else None
-        finally:
-            conn.close()
+            return result._asdict() if result else None
 
     # ==========================================
     # 文档管理 (Source Docs)
@@ -176,46 +290,174 @@ class DatabaseManager:
         Returns:
             doc_id: 文档ID
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            sql = """
-                INSERT INTO source_docs (work_id, file_path, file_name, doc_meta)
-                VALUES (%s, %s, %s, %s)
-                RETURNING doc_id;
-            """
-            cur.execute(sql, (work_id, file_path, file_name or file_path, Json(doc_meta or {})))
-            doc_id = cur.fetchone()[0]
-            conn.commit()
-            print(f"[DB] 创建文档成功: doc_id={doc_id}, file={file_name or file_path}")
-            return doc_id
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 创建文档失败: {e}")
-            return None
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                sql = """
+                    INSERT INTO source_docs (work_id, file_path, file_name, doc_meta)
+                    VALUES (%s, %s, %s, %s)
+                    RETURNING doc_id;
+                """
+                cur.execute(sql, (work_id, file_path, file_name or file_path, _dump_json(doc_meta or {})))
+                doc_id = cur.fetchone()[0]
+                conn.commit()
+                logger.debug("创建文档成功: doc_id=%s, file=%s", doc_id, file_name or file_path)
+                return doc_id
+            except Exception as e:
+                conn.rollback()
+                logger.error("创建文档失败: %s", e)
+                return None
 
     def update_document_atom_count(self, doc_id: int, total_atoms: int):
         """更新文档的原子总数"""
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE source_docs SET total_atoms = %s, status = 'processed' WHERE doc_id = %s",
-                (total_atoms, doc_id)
-            )
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新文档原子数失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE source_docs SET total_atoms = %s, status = 'processed' WHERE doc_id = %s",
+                    (total_atoms, doc_id)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新文档原子数失败: %s", e)
 
     # ==========================================
     # 处理原子 (Processing Atoms) - 核心操作
     # ==========================================
 
+    # COPY 批量导入的阈值，小批量走 execute_values 即可
+    COPY_BATCH_THRESHOLD = 500
+
+    # 翻译类动作（会刷新 is_active 激活状态）
+    TRANSLATION_ACTIONS = ('draft', 'refine', 'final', 'human_edit')
+
+    # 高频单行语句的服务端预编译定义: name -> (参数类型, 语句体)
+    # 配合连接池使用，同一连接上只 PREPARE 一次，省掉每次调用的 parse/plan
+    _PREPARED_STATEMENTS = {
+        'upd_atom_trans': (
+            "text, int, real, int",
+            "UPDATE processing_atoms SET translated_text = $1, status_code = $2, "
+            "quality_score = $3, updated_at = CURRENT_TIMESTAMP WHERE atom_id = $4"
+        ),
+        'upd_atom_summary': (
+            "text, int",
+            "UPDATE processing_atoms SET summary = $1, updated_at = CURRENT_TIMESTAMP WHERE atom_id = $2"
+        ),
+        'upd_atom_ctx': (
+            "jsonb, int",
+            "UPDATE processing_atoms SET context_info = $1, updated_at = CURRENT_TIMESTAMP WHERE atom_id = $2"
+        ),
+        'upd_atom_exam': (
+            "jsonb, int",
+            "UPDATE processing_atoms SET examination = $1, updated_at = CURRENT_TIMESTAMP WHERE atom_id = $2"
+        ),
+        'sel_atom': (
+            "int",
+            "SELECT * FROM processing_atoms WHERE atom_id = $1"
+        ),
+        'sel_active_trans': (
+            "int",
+            "SELECT content FROM agent_traces WHERE atom_id = $1 AND is_active = TRUE LIMIT 1"
+        ),
+    }
+
+    def _execute_prepared(self, conn, cur, name, params):
+        """在连接上执行预编译语句，首次使用时先 PREPARE
+
+        已 PREPARE 的语句名记在管理器侧（连接对象是C类型挂不了属性）。
+        PREPARE 的结果在会话内跨事务存活（回滚也不会废弃），
+        所以缓存只增不清；若因 id 复用等原因缓存丢失而重复 PREPARE，
+        按"已就绪"处理
+        """
+        real_conn = getattr(conn, '_conn', conn)  # 事务代理 → 底层连接
+        prepared = self._prepared_names.setdefault(id(real_conn), set())
+        if name not in prepared:
+            arg_types, body = self._PREPARED_STATEMENTS[name]
+            try:
+                cur.execute(f"PREPARE {name} ({arg_types}) AS {body}")
+            except psycopg2.errors.DuplicatePreparedStatement:
+                # 语句其实已在此连接上就绪；错误使当前事务中止，先回滚
+                real_conn.rollback()
+            prepared.add(name)
+        placeholders = ', '.join(['%s'] * len(params))
+        cur.execute(f"EXECUTE {name} ({placeholders})", params)
+
+    @staticmethod
+    def _vector_param(vector, half: bool = False):
+        """
+        向量参数绑定
+
+        装有 pgvector 适配器时直接传连续 float32 ndarray（零拷贝适配）；
+        否则退化为 pgvector 的文本字面量，避免 list→ARRAY 适配再隐式转换。
+        half=True 时量化为 fp16，对应 knowledge_base 的 halfvec 列
+        """
+        if half:
+            quantized = np.asarray(vector, dtype=np.float16)
+            if HalfVector is not None:
+                return HalfVector(quantized)
+            return '[' + ','.join(map(str, quantized.tolist())) + ']'
+        if register_vector is not None:
+            return np.ascontiguousarray(vector, dtype=np.float32)
+        if isinstance(vector, np.ndarray):
+            vector = vector.tolist()
+        return '[' + ','.join(map(str, vector)) + ']'
+
+    @staticmethod
+    def _copy_escape(text: str) -> str:
+        """按 COPY TEXT 格式转义字段内容"""
+        return (text.replace('\\', '\\\\')
+                    .replace('\t', '\\t')
+                    .replace('\n', '\\n')
+                    .replace('\r', '\\r'))
+
+    def _bulk_copy_atoms(self, cur, doc_id: int, atoms: List[Dict]) -> List[int]:
+        """
+        通过 COPY 批量导入原子（大批量路径）
+
+        先 COPY 进临时表，再 INSERT ... SELECT ... RETURNING 取回 atom_id，
+        避免逐页 INSERT 的 SQL 解析开销
+        """
+        # 同一事务内可能多次走 COPY 路径（transaction() 批量导入多文档），
+        # ON COMMIT DROP 要到提交时才清掉上一张临时表，先显式删除
+        cur.execute("""
+            DROP TABLE IF EXISTS atoms_stage;
+            CREATE TEMP TABLE atoms_stage (
+                source_text TEXT,
+                position INTEGER,
+                summary TEXT,
+                context_info JSONB
+            ) ON COMMIT DROP;
+        """)
+
+        buf = io.StringIO()
+        for idx, atom in enumerate(atoms):
+            source_text = atom.get('source_text', '')
+            position = atom.get('position', idx)
+            summary = atom.get('summary', '')
+            context_info = atom.get('context_info', {})
+            buf.write('\t'.join((
+                self._copy_escape(source_text),
+                str(position),
+                self._copy_escape(summary),
+                self._copy_escape(_dump_json(context_info))
+            )))
+            buf.write('\n')
+        buf.seek(0)
+
+        cur.copy_expert(
+            "COPY atoms_stage (source_text, position, summary, context_info) FROM STDIN",
+            buf
+        )
+        cur.execute("""
+            INSERT INTO processing_atoms
+            (doc_id, source_text, position, summary, context_info)
+            SELECT %s, source_text, position, summary, context_info
+            FROM atoms_stage ORDER BY position
+            RETURNING atom_id;
+        """, (doc_id,))
+        return [row[0] for row in cur.fetchall()]
+
     def create_atoms_batch(self, doc_id: int, atoms: List[Dict]) -> List[int]:
         """
         批量创建处理原子
@@ -234,79 +476,66 @@ class DatabaseManager:
         if not atoms:
             return []
             
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            
-            # 准备批量插入数据
-            values = []
-            for idx, atom in enumerate(atoms):
-                source_text = atom.get('source_text', '')
-                source_hash = hashlib.md5(source_text.encode()).hexdigest()
-                position = atom.get('position', idx)
-                summary = atom.get('summary', '')
-                context_info = atom.get('context_info', {})
-                
-                values.append((
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+
+                # 大批量走 COPY 路径，消除逐页 INSERT 的解析开销
+                if len(atoms) >= self.COPY_BATCH_THRESHOLD:
+                    atom_ids = self._bulk_copy_atoms(cur, doc_id, atoms)
+                    conn.commit()
+                    logger.debug("批量创建原子成功(COPY): doc_id=%s, count=%s", doc_id, len(atom_ids))
+                    return atom_ids
+
+                # 准备批量插入数据 (source_hash 由服务端生成列计算)
+                values = [(
                     doc_id,
-                    source_text,
-                    source_hash,
-                    position,
-                    summary,
-                    Json(context_info)
-                ))
-            
-            # 批量插入
-            sql = """
-                INSERT INTO processing_atoms 
-                (doc_id, source_text, source_hash, position, summary, context_info)
-                VALUES %s
-                RETURNING atom_id;
-            """
-            execute_values(cur, sql, values, template="(%s, %s, %s, %s, %s, %s)")
-            
-            # 获取返回的 atom_ids
-            # 注意: execute_values 不能直接返回多个ID，需要重新查询
-            cur.execute(
-                "SELECT atom_id FROM processing_atoms WHERE doc_id = %s ORDER BY position",
-                (doc_id,)
-            )
-            atom_ids = [row[0] for row in cur.fetchall()]
-            
-            conn.commit()
-            print(f"[DB] 批量创建原子成功: doc_id={doc_id}, count={len(atom_ids)}")
-            return atom_ids[-len(atoms):]  # 返回最后插入的N个ID
+                    atom.get('source_text', ''),
+                    atom.get('position', idx),
+                    atom.get('summary', ''),
+                    _dump_json(atom.get('context_info', {}))
+                ) for idx, atom in enumerate(atoms)]
+
+                # 批量插入，fetch=True 直接取回 RETURNING 的 atom_id
+                sql = """
+                    INSERT INTO processing_atoms
+                    (doc_id, source_text, position, summary, context_info)
+                    VALUES %s
+                    RETURNING atom_id;
+                """
+                rows = execute_values(
+                    cur, sql, values,
+                    template="(%s, %s, %s, %s, %s)",
+                    page_size=500, fetch=True
+                )
+                atom_ids = [row[0] for row in rows]
+
+                conn.commit()
+                logger.debug("批量创建原子成功: doc_id=%s, count=%s", doc_id, len(atom_ids))
+                return atom_ids
             
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 批量创建原子失败: {e}")
-            return []
-        finally:
-            conn.close()
+            except Exception as e:
+                conn.rollback()
+                logger.error("批量创建原子失败: %s", e)
+                return []
 
     def get_atom(self, atom_id: int) -> Optional[Dict]:
         """获取单个原子信息"""
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
-            cur.execute("SELECT * FROM processing_atoms WHERE atom_id = %s", (atom_id,))
+        with self._conn() as conn:
+            cur = conn.cursor(cursor_factory=NamedTupleCursor)
+            self._execute_prepared(conn, cur, 'sel_atom', (atom_id,))
             result = cur.fetchone()
-            return dict(result) if result else None
-        finally:
-            conn.close()
+            return result._asdict() if result else None
 
     def get_atoms_by_doc(self, doc_id: int) -> List[Dict]:
         """获取文档下的所有原子"""
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
+        with self._conn() as conn:
+            cur = conn.cursor(cursor_factory=NamedTupleCursor)
             cur.execute(
                 "SELECT * FROM processing_atoms WHERE doc_id = %s ORDER BY position",
                 (doc_id,)
             )
-            return [dict(row) for row in cur.fetchall()]
-        finally:
-            conn.close()
+            return [row._asdict() for row in cur.fetchall()]
 
     def update_atom_translation(self, atom_id: int, translated_text: str, 
                                 status_code: int = 1, quality_score: float = None):
@@ -319,40 +548,28 @@ class DatabaseManager:
             status_code: 状态码 (1=已初翻, 2=已润色, 3=已审核, 4=已完成)
             quality_score: 质量评分 (0-10)
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            sql = """
-                UPDATE processing_atoms 
-                SET translated_text = %s, 
-                    status_code = %s,
-                    quality_score = %s,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE atom_id = %s
-            """
-            cur.execute(sql, (translated_text, status_code, quality_score, atom_id))
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新原子翻译失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                self._execute_prepared(
+                    conn, cur, 'upd_atom_trans',
+                    (translated_text, status_code, quality_score, atom_id)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新原子翻译失败: %s", e)
 
     def update_atom_summary(self, atom_id: int, summary: str):
         """更新原子的片段摘要"""
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE processing_atoms SET summary = %s, updated_at = CURRENT_TIMESTAMP WHERE atom_id = %s",
-                (summary, atom_id)
-            )
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新原子摘要失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                self._execute_prepared(conn, cur, 'upd_atom_summary', (summary, atom_id))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新原子摘要失败: %s", e)
 
     def update_atom_examination(self, atom_id: int, examination: Dict):
         """
@@ -368,19 +585,14 @@ class DatabaseManager:
                 "algorithm": "backtranslation"
             }
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE processing_atoms SET examination = %s, updated_at = CURRENT_TIMESTAMP WHERE atom_id = %s",
-                (Json(examination), atom_id)
-            )
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新原子质量检查信息失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                self._execute_prepared(conn, cur, 'upd_atom_exam', (_dump_json(examination), atom_id))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新原子质量检查信息失败: %s", e)
 
     def update_atom_context(self, atom_id: int, context_info: Dict):
         """
@@ -396,37 +608,28 @@ class DatabaseManager:
             "similar_atoms": [{"source": "xxx", "translated": "xxx"}]
         }
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE processing_atoms SET context_info = %s, updated_at = CURRENT_TIMESTAMP WHERE atom_id = %s",
-                (Json(context_info), atom_id)
-            )
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新原子上下文失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                self._execute_prepared(conn, cur, 'upd_atom_ctx', (_dump_json(context_info), atom_id))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新原子上下文失败: %s", e)
 
     def update_atom_vector(self, atom_id: int, vector: List[float]):
         """更新原子的语义向量"""
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            if isinstance(vector, np.ndarray):
-                vector = vector.tolist()
-            cur.execute(
-                "UPDATE processing_atoms SET semantic_vec = %s WHERE atom_id = %s",
-                (vector, atom_id)
-            )
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 更新原子向量失败: {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE processing_atoms SET semantic_vec = %s WHERE atom_id = %s",
+                    (self._vector_param(vector), atom_id)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("更新原子向量失败: %s", e)
 
     def batch_update_atoms(self, updates: List[Dict]):
         """
@@ -440,44 +643,48 @@ class DatabaseManager:
                 - quality_score: 质量评分 (可选)
                 - context_info: 上下文信息 (可选)
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            for update in updates:
-                atom_id = update.get('atom_id')
-                if not atom_id:
-                    continue
-                    
-                # 构建动态 UPDATE 语句
-                set_clauses = []
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+
+                # 一条 UPDATE ... FROM (VALUES ...) 完成全部更新
+                # 缺失字段以 None 占位，COALESCE 保留原值
                 values = []
-                
-                if 'translated_text' in update:
-                    set_clauses.append("translated_text = %s")
-                    values.append(update['translated_text'])
-                if 'status_code' in update:
-                    set_clauses.append("status_code = %s")
-                    values.append(update['status_code'])
-                if 'quality_score' in update:
-                    set_clauses.append("quality_score = %s")
-                    values.append(update['quality_score'])
-                if 'context_info' in update:
-                    set_clauses.append("context_info = %s")
-                    values.append(Json(update['context_info']))
-                    
-                if set_clauses:
-                    set_clauses.append("updated_at = CURRENT_TIMESTAMP")
-                    sql = f"UPDATE processing_atoms SET {', '.join(set_clauses)} WHERE atom_id = %s"
-                    values.append(atom_id)
-                    cur.execute(sql, values)
-            
-            conn.commit()
-            print(f"[DB] 批量更新原子成功: count={len(updates)}")
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 批量更新原子失败: {e}")
-        finally:
-            conn.close()
+                for update in updates:
+                    atom_id = update.get('atom_id')
+                    if not atom_id:
+                        continue
+                    context_info = update.get('context_info')
+                    values.append((
+                        atom_id,
+                        update.get('translated_text'),
+                        update.get('status_code'),
+                        update.get('quality_score'),
+                        _dump_json(context_info) if context_info is not None else None
+                    ))
+
+                if values:
+                    sql = """
+                        UPDATE processing_atoms AS p
+                        SET translated_text = COALESCE(v.translated_text, p.translated_text),
+                            status_code = COALESCE(v.status_code, p.status_code),
+                            quality_score = COALESCE(v.quality_score, p.quality_score),
+                            context_info = COALESCE(v.context_info, p.context_info),
+                            updated_at = CURRENT_TIMESTAMP
+                        FROM (VALUES %s) AS v(atom_id, translated_text, status_code, quality_score, context_info)
+                        WHERE p.atom_id = v.atom_id
+                    """
+                    execute_values(
+                        cur, sql, values,
+                        template="(%s::int, %s, %s::int, %s::real, %s::jsonb)",
+                        page_size=500
+                    )
+
+                conn.commit()
+                logger.debug("批量更新原子成功: count=%s", len(updates))
+            except Exception as e:
+                conn.rollback()
+                logger.error("批量更新原子失败: %s", e)
 
     # ==========================================
     # Agent 轨迹 (Agent Traces) - 事件溯源
@@ -508,49 +715,56 @@ class DatabaseManager:
         Returns:
             trace_id: 轨迹ID
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
             
-            # 判断是否是翻译类操作（需要设置 is_active）
-            is_translation_action = action_type in ['draft', 'refine', 'final', 'human_edit']
-            
-            # 如果是翻译操作，先将该原子之前的记录设为非激活
-            if is_translation_action:
-                cur.execute(
-                    "UPDATE agent_traces SET is_active = FALSE WHERE atom_id = %s AND is_active = TRUE",
-                    (atom_id,)
+                # 判断是否是翻译类操作（需要设置 is_active）
+                is_translation_action = action_type in self.TRANSLATION_ACTIONS
+
+                params = (
+                    atom_id,
+                    agent_role,
+                    action_type,
+                    content,
+                    _dump_json(quality_report or {}),
+                    _dump_json(meta_data or {}),
+                    input_tokens,
+                    output_tokens,
+                    is_translation_action
                 )
+
+                if is_translation_action:
+                    # CTE 把"取消旧轨迹激活"与插入合并为一次服务端往返
+                    sql = """
+                        WITH deact AS (
+                            UPDATE agent_traces SET is_active = FALSE
+                            WHERE atom_id = %s AND is_active = TRUE
+                        )
+                        INSERT INTO agent_traces
+                        (atom_id, agent_role, action_type, content, quality_report,
+                         meta_data, input_tokens, output_tokens, is_active)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        RETURNING trace_id;
+                    """
+                    cur.execute(sql, (atom_id,) + params)
+                else:
+                    sql = """
+                        INSERT INTO agent_traces
+                        (atom_id, agent_role, action_type, content, quality_report,
+                         meta_data, input_tokens, output_tokens, is_active)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        RETURNING trace_id;
+                    """
+                    cur.execute(sql, params)
+                trace_id = cur.fetchone()[0]
+                conn.commit()
+                return trace_id
             
-            # 插入新轨迹
-            sql = """
-                INSERT INTO agent_traces 
-                (atom_id, agent_role, action_type, content, quality_report, 
-                 meta_data, input_tokens, output_tokens, is_active)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING trace_id;
-            """
-            cur.execute(sql, (
-                atom_id,
-                agent_role,
-                action_type,
-                content,
-                Json(quality_report or {}),
-                Json(meta_data or {}),
-                input_tokens,
-                output_tokens,
-                is_translation_action
-            ))
-            trace_id = cur.fetchone()[0]
-            conn.commit()
-            return trace_id
-            
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 添加轨迹失败: {e}")
-            return -1
-        finally:
-            conn.close()
+            except Exception as e:
+                conn.rollback()
+                logger.error("添加轨迹失败: %s", e)
+                return -1
 
     def add_trace_batch(self, traces: List[Dict]) -> List[int]:
         """
@@ -560,47 +774,72 @@ class DatabaseManager:
             traces: 轨迹列表，每个包含:
                 - atom_id, agent_role, action_type, content, quality_report, meta_data
         """
-        trace_ids = []
-        for trace in traces:
-            trace_id = self.add_trace(
-                atom_id=trace.get('atom_id'),
-                agent_role=trace.get('agent_role', 'Unknown'),
-                action_type=trace.get('action_type', 'unknown'),
-                content=trace.get('content'),
-                quality_report=trace.get('quality_report'),
-                meta_data=trace.get('meta_data'),
-                input_tokens=trace.get('input_tokens', 0),
-                output_tokens=trace.get('output_tokens', 0)
-            )
-            trace_ids.append(trace_id)
-        return trace_ids
+        if not traces:
+            return []
+
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
+
+                # 同一 atom 多条翻译轨迹时，只有最后一条保持激活
+                last_translation_idx = {}
+                for idx, trace in enumerate(traces):
+                    if trace.get('action_type') in self.TRANSLATION_ACTIONS:
+                        last_translation_idx[trace.get('atom_id')] = idx
+
+                # 1. 一次性将受影响原子的旧轨迹设为非激活
+                if last_translation_idx:
+                    cur.execute(
+                        "UPDATE agent_traces SET is_active = FALSE WHERE is_active = TRUE AND atom_id = ANY(%s)",
+                        (list(last_translation_idx.keys()),)
+                    )
+
+                # 2. 批量插入全部轨迹并取回 trace_id
+                values = [(
+                    trace.get('atom_id'),
+                    trace.get('agent_role', 'Unknown'),
+                    trace.get('action_type', 'unknown'),
+                    trace.get('content'),
+                    _dump_json(trace.get('quality_report') or {}),
+                    _dump_json(trace.get('meta_data') or {}),
+                    trace.get('input_tokens', 0),
+                    trace.get('output_tokens', 0),
+                    last_translation_idx.get(trace.get('atom_id')) == idx
+                ) for idx, trace in enumerate(traces)]
+
+                rows = execute_values(cur, """
+                    INSERT INTO agent_traces
+                    (atom_id, agent_role, action_type, content, quality_report,
+                     meta_data, input_tokens, output_tokens, is_active)
+                    VALUES %s
+                    RETURNING trace_id;
+                """, values, page_size=500, fetch=True)
+
+                conn.commit()
+                return [row[0] for row in rows]
+
+            except Exception as e:
+                conn.rollback()
+                logger.error("批量添加轨迹失败: %s", e)
+                return [-1] * len(traces)
 
     def get_atom_traces(self, atom_id: int) -> List[Dict]:
         """获取原子的所有轨迹记录"""
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor(cursor_factory=RealDictCursor)
+        with self._conn() as conn:
+            cur = conn.cursor(cursor_factory=NamedTupleCursor)
             cur.execute(
                 "SELECT * FROM agent_traces WHERE atom_id = %s ORDER BY created_at",
                 (atom_id,)
             )
-            return [dict(row) for row in cur.fetchall()]
-        finally:
-            conn.close()
+            return [row._asdict() for row in cur.fetchall()]
 
     def get_active_translation(self, atom_id: int) -> Optional[str]:
         """获取原子当前激活的译文"""
-        conn = self.get_pg_connection()
-        try:
+        with self._conn() as conn:
             cur = conn.cursor()
-            cur.execute(
-                "SELECT content FROM agent_traces WHERE atom_id = %s AND is_active = TRUE LIMIT 1",
-                (atom_id,)
-            )
+            self._execute_prepared(conn, cur, 'sel_active_trans', (atom_id,))
             result = cur.fetchone()
             return result[0] if result else None
-        finally:
-            conn.close()
 
     # ==========================================
     # 知识库 (Knowledge Base) - RAG 支持
@@ -623,32 +862,27 @@ class DatabaseManager:
         Returns:
             kb_id: 知识条目ID
         """
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
             
-            vec = None
-            if vector:
-                if isinstance(vector, np.ndarray):
-                    vec = vector.tolist()
-                else:
-                    vec = vector
+                vec = None
+                if vector is not None and len(vector):
+                    vec = self._vector_param(vector, half=True)
             
-            sql = """
-                INSERT INTO knowledge_base (work_id, content, kb_type, semantic_vec, meta_tags, source_ref)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING kb_id;
-            """
-            cur.execute(sql, (work_id, content, kb_type, vec, Json(meta_tags or {}), source_ref))
-            kb_id = cur.fetchone()[0]
-            conn.commit()
-            return kb_id
-        except Exception as e:
-            conn.rollback()
-            print(f"[DB] 添加知识条目失败: {e}")
-            return None
-        finally:
-            conn.close()
+                sql = """
+                    INSERT INTO knowledge_base (work_id, content, kb_type, semantic_vec, meta_tags, source_ref)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    RETURNING kb_id;
+                """
+                cur.execute(sql, (work_id, content, kb_type, vec, _dump_json(meta_tags or {}), source_ref))
+                kb_id = cur.fetchone()[0]
+                conn.commit()
+                return kb_id
+            except Exception as e:
+                conn.rollback()
+                logger.error("添加知识条目失败: %s", e)
+                return None
 
     def search_knowledge(self, query_vec: List[float], work_id: int = None,
                         kb_type: str = None, limit: int = 5) -> List[Dict]:
@@ -667,46 +901,54 @@ class DatabaseManager:
         if not query_vec:
             return []
             
-        conn = self.get_pg_connection()
-        try:
-            cur = conn.cursor()
-            
-            # 构建查询条件
-            conditions = []
-            params = [query_vec]
+        with self._conn() as conn:
+            try:
+                cur = conn.cursor()
             
-            if work_id:
-                conditions.append("work_id = %s")
-                params.append(work_id)
-            if kb_type:
-                conditions.append("kb_type = %s")
-                params.append(kb_type)
+                # 构建查询条件
+                query_param = self._vector_param(query_vec, half=True)
+                conditions = []
+                params = [query_param]
             
-            where_clause = " AND ".join(conditions) if conditions else "TRUE"
-            params.append(limit)
+                if work_id:
+                    conditions.append("work_id = %s")
+                    params.append(work_id)
+                if kb_type:
+                    conditions.append("kb_type = %s")
+                    params.append(kb_type)
             
-            sql = f"""
-                SELECT kb_id, content, kb_type, meta_tags, 
-                       1 - (semantic_vec <=> %s::vector) as similarity
-                FROM knowledge_base
-                WHERE {where_clause} AND semantic_vec IS NOT NULL
-                ORDER BY similarity DESC
-                LIMIT %s;
-            """
-            cur.execute(sql, params)
+                where_clause = " AND ".join(conditions) if conditions else "TRUE"
+                # ORDER BY 里再次绑定查询向量
+                params.append(query_param)
+                params.append(limit)
+
+                # HNSW 检索的召回/延迟平衡，仅对当前事务生效
+                cur.execute("SET LOCAL hnsw.ef_search = 40")
+
+                # 注意：必须按裸距离升序排序——pgvector 只为
+                # ORDER BY <列> <=> <常量> ASC 走 HNSW 索引，
+                # 按投影出的 similarity DESC 排序会退化成全表扫描+排序；
+                # 相似度仅在投影里计算供调用方使用
+                sql = f"""
+                    SELECT kb_id, content, kb_type, meta_tags, 
+                           1 - (semantic_vec <=> %s::halfvec) as similarity
+                    FROM knowledge_base
+                    WHERE {where_clause} AND semantic_vec IS NOT NULL
+                    ORDER BY semantic_vec <=> %s::halfvec
+                    LIMIT %s;
+                """
+                cur.execute(sql, params)
             
-            return [{
-                "kb_id": row[0],
-                "content": row[1],
-                "kb_type": row[2],
-                "meta_tags": row[3],
-                "similarity": float(row[4])
-            } for row in cur.fetchall()]
-        except Exception as e:
-            print(f"[DB] 知识库检索失败: {e}")
-            return []
-        finally:
-            conn.close()
+                return [{
+                    "kb_id": row[0],
+                    "content": row[1],
+                    "kb_type": row[2],
+                    "meta_tags": row[3],
+                    "similarity": float(row[4])
+                } for row in cur.fetchall()]
+            except Exception as e:
+                logger.error("知识库检索失败: %s", e)
+                return []
 
     def add_translation_memory(self, work_id: int, source: str, translation: str,
                               vector: List[float] = None, domain: str = None) -> Optional[int]:
@@ -756,29 +998,91 @@ class DatabaseManager:
         """
         if not self.es:
             return
-            
+
         try:
-            doc_id = f"{work_id}_{entry_key}"
-            doc = {
-                "entry_key": entry_key,
-                "entry_val": entry_val,
-                "work_id": work_id,
-                "word_type": word_type,
-                "domain_tag": domain,
-                "variants": [{"text": v, "lang": "auto"} for v in (variants or [])],
-                "example_sentences": example_sentences or [],
-                "translations": translations or [],
-                "atom_ids": atom_ids or [],
-                "confidence": confidence,
-                "source_ref": source_ref,
-                "agent_notes": agent_notes,
-                "is_confirmed": is_confirmed,
-                "updated_at": datetime.datetime.now().isoformat()
-            }
+            doc_id, doc = self._build_term_doc(
+                entry_key, entry_val, work_id, word_type, domain, variants,
+                example_sentences, translations, atom_ids, confidence,
+                source_ref, agent_notes, is_confirmed
+            )
             self.es.index(index="domain_lexicon", id=doc_id, body=doc)
-            print(f"[DB] 术语更新成功: {entry_key} -> {entry_val}")
+            logger.debug("术语更新成功: %s -> %s", entry_key, entry_val)
         except Exception as e:
-            print(f"[DB] ES 术语更新失败: {e}")
+            logger.error("ES 术语更新失败: %s", e)
+
+    @staticmethod
+    def _build_term_doc(entry_key, entry_val, work_id, word_type="term",
+                        domain="general", variants=None, example_sentences=None,
+                        translations=None, atom_ids=None, confidence=1.0,
+                        source_ref=None, agent_notes=None, is_confirmed=False):
+        """构建术语文档，返回 (doc_id, doc)"""
+        doc = {
+            "entry_key": entry_key,
+            "entry_val": entry_val,
+            "work_id": work_id,
+            "word_type": word_type,
+            "domain_tag": domain,
+            "variants": [{"text": v, "lang": "auto"} for v in (variants or [])],
+            "example_sentences": example_sentences or [],
+            "translations": translations or [],
+            "atom_ids": atom_ids or [],
+            "confidence": confidence,
+            "source_ref": source_ref,
+            "agent_notes": agent_notes,
+            "is_confirmed": is_confirmed,
+            "updated_at": datetime.datetime.now().isoformat()
+        }
+        return f"{work_id}_{entry_key}", doc
+
+    def upsert_terms_bulk(self, terms: List[Dict], chunk_size: int = 500) -> int:
+        """
+        批量添加或更新术语（一次 HTTP 请求写入一批，代替逐条 index）
+
+        Args:
+            terms: 术语列表，每项为 upsert_term 的同名参数字典
+                   (entry_key, entry_val, work_id 必须，其余可选)
+            chunk_size: 每个 bulk 请求的文档数
+
+        Returns:
+            成功写入的文档数
+        """
+        if not self.es or not terms:
+            return 0
+
+        try:
+            from elasticsearch.helpers import bulk
+
+            # 导入期间放宽 refresh，减少段刷新开销
+            self._set_lexicon_refresh("30s")
+            try:
+                actions = []
+                for term in terms:
+                    doc_id, doc = self._build_term_doc(**term)
+                    actions.append({
+                        "_op_type": "index",
+                        "_index": "domain_lexicon",
+                        "_id": doc_id,
+                        "_source": doc
+                    })
+                success, _ = bulk(self.es, actions, chunk_size=chunk_size, request_timeout=60)
+            finally:
+                self._set_lexicon_refresh("1s")
+
+            logger.debug("术语批量更新成功: count=%s", success)
+            return success
+        except Exception as e:
+            logger.error("ES 术语批量更新失败: %s", e)
+            return 0
+
+    def _set_lexicon_refresh(self, interval: str):
+        """调整术语索引的 refresh_interval (批量导入前调大、导入后恢复)"""
+        try:
+            self.es.indices.put_settings(
+                index="domain_lexicon",
+                body={"index": {"refresh_interval": interval}}
+            )
+        except Exception:
+            pass
 
     def confirm_term(self, work_id: int, entry_key: str, entry_val: str = None):
         """
@@ -804,9 +1108,9 @@ class DatabaseManager:
                 update_body["doc"]["entry_val"] = entry_val
             
             self.es.update(index="domain_lexicon", id=doc_id, body=update_body)
-            print(f"[DB] 术语确认成功: {entry_key}")
+            logger.debug("术语确认成功: %s", entry_key)
         except Exception as e:
-            print(f"[DB] ES 术语确认失败: {e}")
+            logger.error("ES 术语确认失败: %s", e)
 
     def search_terms(self, query: str, work_id: int = None, 
                     domain: str = None, limit: int = 10) -> List[Dict]:
@@ -824,67 +1128,105 @@ class DatabaseManager:
         """
         if not self.es:
             return []
-            
+
         try:
-            must_clauses = [{
-                "multi_match": {
-                    "query": query,
-                    "fields": ["entry_key^3", "entry_val", "variants.text"]
-                }
-            }]
-            
-            filter_clauses = []
-            if work_id:
-                filter_clauses.append({"terms": {"work_id": [work_id, 0]}})
-            if domain:
-                filter_clauses.append({"term": {"domain_tag": domain}})
-            
-            body = {
-                "query": {
-                    "bool": {
-                        "must": must_clauses,
-                        "filter": filter_clauses if filter_clauses else None
-                    }
-                },
-                "size": limit
-            }
-            
+            body = self._build_term_query(query, work_id, domain, limit)
             res = self.es.search(index="domain_lexicon", body=body)
             return [hit["_source"] for hit in res['hits']['hits']]
-            
+
         except Exception as e:
-            print(f"[DB] ES 术语检索失败: {e}")
+            logger.error("ES 术语检索失败: %s", e)
             return []
 
+    @staticmethod
+    def _build_term_query(query: str, work_id: int = None,
+                          domain: str = None, limit: int = 10) -> Dict:
+        """构建术语检索的查询体"""
+        must_clauses = [{
+            "multi_match": {
+                "query": query,
+                "fields": ["entry_key^3", "entry_val", "variants.text"]
+            }
+        }]
+
+        filter_clauses = []
+        if work_id:
+            filter_clauses.append({"terms": {"work_id": [work_id, 0]}})
+        if domain:
+            filter_clauses.append({"term": {"domain_tag": domain}})
+
+        return {
+            "query": {
+                "bool": {
+                    "must": must_clauses,
+                    "filter": filter_clauses if filter_clauses else None
+                }
+            },
+            "size": limit
+        }
+
+    def search_terms_batch(self, queries: List[Dict]) -> List[List[Dict]]:
+        """
+        批量检索术语（一次 msearch 请求完成 N 个查询）
+
+        Args:
+            queries: 查询列表，每项为 search_terms 的同名参数字典
+                     (query 必须; work_id, domain, limit 可选)
+
+        Returns:
+            与输入顺序对齐的术语列表的列表
+        """
+        if not self.es or not queries:
+            return [[] for _ in queries]
+
+        try:
+            body = []
+            for q in queries:
+                body.append({"index": "domain_lexicon"})
+                body.append(self._build_term_query(
+                    q['query'], q.get('work_id'), q.get('domain'), q.get('limit', 10)
+                ))
+
+            res = self.es.msearch(body=body)
+            results = []
+            for resp in res['responses']:
+                if 'error' in resp:
+                    results.append([])
+                else:
+                    results.append([hit["_source"] for hit in resp['hits']['hits']])
+            return results
+
+        except Exception as e:
+            logger.error("ES 术语批量检索失败: %s", e)
+            return [[] for _ in queries]
+
     # ==========================================
     # 统计与查询
     # ==========================================
 
     def get_project_stats(self, work_id: int) -> Dict:
         """获取项目统计信息"""
-        conn = self.get_pg_connection()
-        try:
+        with self._conn() as conn:
             cur = conn.cursor()
-            
-            # 文档数
-            cur.execute("SELECT COUNT(*) FROM source_docs WHERE work_id = %s", (work_id,))
-            doc_count = cur.fetchone()[0]
-            
-            # 原子数及状态分布
+
+            # 文档数与原子状态分布合并为一次查询
             cur.execute("""
-                SELECT 
+                SELECT
+                    (SELECT COUNT(*) FROM source_docs WHERE work_id = %s) as doc_count,
                     COUNT(*) as total,
-                    COUNT(CASE WHEN pa.status_code = 0 THEN 1 END) as pending,
-                    COUNT(CASE WHEN pa.status_code = 1 THEN 1 END) as drafted,
-                    COUNT(CASE WHEN pa.status_code >= 2 THEN 1 END) as refined,
-                    COUNT(CASE WHEN pa.status_code >= 4 THEN 1 END) as completed,
+                    COUNT(*) FILTER (WHERE pa.status_code = 0) as pending,
+                    COUNT(*) FILTER (WHERE pa.status_code = 1) as drafted,
+                    COUNT(*) FILTER (WHERE pa.status_code >= 2) as refined,
+                    COUNT(*) FILTER (WHERE pa.status_code >= 4) as completed,
                     AVG(pa.quality_score) as avg_quality
                 FROM processing_atoms pa
                 JOIN source_docs sd ON pa.doc_id = sd.doc_id
                 WHERE sd.work_id = %s
-            """, (work_id,))
-            
+            """, (work_id, work_id))
+
             row = cur.fetchone()
+            doc_count = row[0]
+            row = row[1:]
             return {
                 "doc_count": doc_count,
                 "total_atoms": row[0] or 0,
@@ -894,30 +1236,63 @@ class DatabaseManager:
                 "completed": row[4] or 0,
                 "avg_quality": float(row[5]) if row[5] else None
             }
-        finally:
-            conn.close()
 
     def get_translation_progress(self, doc_id: int) -> Dict:
         """获取文档翻译进度"""
-        conn = self.get_pg_connection()
-        try:
+        with self._conn() as conn:
             cur = conn.cursor()
+            # FILTER 比 CASE WHEN 省去每行的表达式求值；
+            # 配合 idx_atoms_doc(doc_id) INCLUDE (status_code) 可走 index-only scan
             cur.execute("""
-                SELECT 
+                SELECT
                     COUNT(*) as total,
-                    COUNT(CASE WHEN status_code > 0 THEN 1 END) as translated,
-                    COUNT(CASE WHEN status_code >= 4 THEN 1 END) as completed
+                    COUNT(*) FILTER (WHERE status_code > 0) as translated,
+                    COUNT(*) FILTER (WHERE status_code >= 4) as completed
                 FROM processing_atoms
                 WHERE doc_id = %s
             """, (doc_id,))
             
             row = cur.fetchone()
             total = row[0] or 1
+            translated = row[1] or 0
+            completed = row[2] or 0
             return {
                 "total": total,
-                "translated": row[1] or 0,
-                "completed": row[2] or 0,
-                "progress": round((row[1] or 0) / total * 100, 2)
+                "translated": translated,
+                "completed": completed,
+                # 不做 round：高频轮询下省一次 C 调用和浮点分配，格式化交给展示层
+                "progress": translated * 100.0 / total
             }
-        finally:
-            conn.close()
+
+    def get_translation_progress_batch(self, doc_ids: List[int]) -> Dict[int, Dict]:
+        """批量获取多个文档的翻译进度（一次往返替代逐文档轮询）"""
+        if not doc_ids:
+            return {}
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT
+                    doc_id,
+                    COUNT(*) as total,
+                    COUNT(*) FILTER (WHERE status_code > 0) as translated,
+                    COUNT(*) FILTER (WHERE status_code >= 4) as completed
+                FROM processing_atoms
+                WHERE doc_id = ANY(%s)
+                GROUP BY doc_id
+            """, (list(doc_ids),))
+
+            progress = {}
+            for doc_id, total, translated, completed in cur.fetchall():
+                total = total or 1
+                translated = translated or 0
+                progress[doc_id] = {
+                    "total": total,
+                    "translated": translated,
+                    "completed": completed or 0,
+                    "progress": translated * 100.0 / total
+                }
+            # 无任何原子的文档不会出现在 GROUP BY 结果里，补零值保持键对齐
+            for doc_id in doc_ids:
+                if doc_id not in progress:
+                    progress[doc_id] = {"total": 1, "translated": 0, "completed": 0, "progress": 0.0}
+            return progress
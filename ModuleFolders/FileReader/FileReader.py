@@ -100,18 +100,20 @@ class FileReader():
         # 获取文件夹中的所有文件
         files = os.listdir(folder_path)
 
-        # 查找以 "CacheData" 开头且以 ".json" 结尾的文件
-        json_files = [file for file in files if file.startswith("AinieeCacheData") and file.endswith(".json")]
+        # 查找以 "CacheData" 开头的快照文件（优先新格式 msgpack，回退旧格式 JSON）
+        cache_files = [file for file in files if file.startswith("AinieeCacheData")
+                       and (file.endswith(".msgpack") or file.endswith(".json"))]
 
-        if not json_files:
-            print(f"Error: No 'CacheData' JSON files found in folder '{folder_path}'.")
+        if not cache_files:
+            print(f"Error: No 'CacheData' files found in folder '{folder_path}'.")
             return None
 
-        # 选择第一个符合条件的 JSON 文件
-        json_file_path = os.path.join(folder_path, json_files[0])
+        # 选择第一个符合条件的快照文件
+        cache_files.sort(key=lambda file: not file.endswith(".msgpack"))
+        cache_file_path = os.path.join(folder_path, cache_files[0])
 
-        # 读取 JSON 文件内容
-        return CacheManager.read_from_file(json_file_path)
+        # 读取快照文件内容
+        return CacheManager.read_from_file(cache_file_path)
 
     def get_support_project_types(self) -> list[str]:
         # 把自动检测类型放到第一个
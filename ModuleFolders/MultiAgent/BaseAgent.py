@@ -18,7 +18,10 @@ class BaseAgent(Base, ABC):
         self.name = name
         self.description = description
         self.config = config
-        self.memory = {}  # Agent的本地记忆存储
+        # Agent的本地记忆存储
+        # 注意：目前没有子类固化任何键，保持 dict 的动态键语义；
+        # 若后续某些键成为高频固定集合，可提升为槽位化的 msgspec.Struct
+        self.memory: Dict[str, Any] = {}
         
     @abstractmethod
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -43,7 +46,8 @@ class BaseAgent(Base, ABC):
         
     def clear_memory(self) -> None:
         """清空内存"""
-        self.memory.clear()
+        # 重新绑定空 dict：整体替换比逐键清理更利于一次性释放旧引用
+        self.memory = {}
         
     def log_agent_action(self, action: str, details: str = "") -> None:
         """记录Agent执行的动作"""
@@ -3,8 +3,9 @@ Griptape Agent包装器
 将自定义Agent包装为Griptape的Agent格式
 """
 
-import json
-from typing import Dict, Any
+import functools
+
+import msgspec
 from griptape.structures import Agent
 from griptape.drivers import OpenAiChatPromptDriver
 from openai import OpenAI
@@ -15,6 +16,23 @@ from .PreprocessingAgent import PreprocessingAgent
 from .TerminologyEntityAgent import TerminologyEntityAgent
 from .TranslationRefinementAgent import TranslationRefinementAgent
 
+# 复用编解码器实例，摊薄每次调用的构造开销
+_ENCODER = msgspec.json.Encoder()
+_DECODER = msgspec.json.Decoder()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_openai_client(api_url: str, api_key: str) -> OpenAI:
+    """按 (api_url, api_key) 复用 OpenAI 客户端
+
+    OpenAI 构造会新建 HTTPX 传输层与连接池，逐 Agent 重建既浪费 CPU
+    也丢掉跨 Agent 的 HTTP keep-alive；同一平台配置共享一个客户端
+    """
+    return OpenAI(
+        api_key=api_key if api_key else "none",
+        base_url=api_url
+    )
+
 
 class GriptapeAgentWrapper(Base):
     """Griptape Agent包装器基类"""
@@ -52,12 +70,9 @@ class GriptapeAgentWrapper(Base):
         api_key = platform_config.get("api_key", "")
         model_name = platform_config.get("model_name", "deepseek-chat")
         
-        # 创建OpenAI客户端（兼容DeepSeek）
-        client = OpenAI(
-            api_key=api_key if api_key else "none",
-            base_url=api_url
-        )
-        
+        # 复用OpenAI客户端（兼容DeepSeek）
+        client = _get_openai_client(api_url, api_key)
+
         # 创建Prompt Driver
         # 注意：新版本的OpenAiChatPromptDriver可能不支持top_p参数
         prompt_driver = OpenAiChatPromptDriver(
@@ -92,17 +107,15 @@ class PreprocessingGriptapeAgent(GriptapeAgentWrapper):
         agent = self._create_griptape_agent(system_prompt)
         return agent
     
-    def execute_task(self, cache_project_data: str) -> Dict[str, Any]:
+    def execute_task(self, cache_project_data: bytes) -> bytes:
         """执行预处理任务（作为Griptape Task的输入处理函数）"""
-        # 将JSON字符串转换回对象
-        import msgspec
-        cache_project = msgspec.json.decode(cache_project_data.encode())
-        
+        # bytes 进 bytes 出：msgspec 原生处理 bytes/str，省去两次整段 UTF-8 转码
+        cache_project = _DECODER.decode(cache_project_data)
+
         # 调用原始Agent
         result = self.preprocessing_agent.execute({"cache_project": cache_project})
-        
-        # 将结果转换为JSON字符串（Griptape Task需要）
-        return msgspec.json.encode(result).decode()
+
+        return _ENCODER.encode(result)
 
 
 class TerminologyGriptapeAgent(GriptapeAgentWrapper):
@@ -130,14 +143,13 @@ class TerminologyGriptapeAgent(GriptapeAgentWrapper):
         agent = self._create_griptape_agent(system_prompt)
         return agent
     
-    def execute_task(self, input_data: str) -> Dict[str, Any]:
+    def execute_task(self, input_data: bytes) -> bytes:
         """执行术语识别任务"""
-        import msgspec
-        data = msgspec.json.decode(input_data.encode())
-        
+        data = _DECODER.decode(input_data)
+
         result = self.terminology_agent.execute(data)
-        
-        return msgspec.json.encode(result).decode()
+
+        return _ENCODER.encode(result)
 
 
 class TranslationGriptapeAgent(GriptapeAgentWrapper):
@@ -163,12 +175,11 @@ class TranslationGriptapeAgent(GriptapeAgentWrapper):
         agent = self._create_griptape_agent(system_prompt)
         return agent
     
-    def execute_task(self, input_data: str) -> Dict[str, Any]:
+    def execute_task(self, input_data: bytes) -> bytes:
         """执行翻译任务"""
-        import msgspec
-        data = msgspec.json.decode(input_data.encode())
-        
+        data = _DECODER.decode(input_data)
+
         result = self.translation_agent.execute(data)
-        
-        return msgspec.json.encode(result).decode()
+
+        return _ENCODER.encode(result)
 
@@ -8,7 +8,9 @@ Griptape Tools
 - Griptape只负责控制流程，不传递大数据对象
 """
 
-import json
+import functools
+import time
+
 import msgspec
 from typing import Dict, Any, List, Optional
 from schema import Schema, Literal
@@ -23,83 +25,144 @@ from .PreprocessingAgent import PreprocessingAgent
 from .TerminologyEntityAgent import TerminologyEntityAgent
 from .TranslationRefinementAgent import TranslationRefinementAgent
 
+# 共享的摘要编码器 (msgspec 默认不做 ASCII 转义，等价于 ensure_ascii=False)
+_SUMMARY_ENCODER = msgspec.json.Encoder()
+
+# 三个Tool的activity都不接收参数，共享同一个空Schema实例
+_EMPTY_SCHEMA = Schema({})
+
+
+class PreprocSummary(msgspec.Struct):
+    """预处理阶段的工具返回摘要"""
+    success: bool
+    stage: str
+    domain: Optional[str] = None
+    style: Optional[str] = None
+
+
+class TerminologySummary(msgspec.Struct):
+    """术语识别阶段的工具返回摘要"""
+    success: bool
+    stage: str
+    terminology_count: int
+
+
+class TranslationSummary(msgspec.Struct):
+    """翻译阶段的工具返回摘要"""
+    success: bool
+    stage: str
+    translated_count: int
+    message: str = ""
+
+
+class _StageProgressMixin:
+    """三个Tool共享的阶段进度上报与schema修正逻辑
+
+    放在 BaseTool 之前继承，保证 to_activity_json_schema 覆盖生效，
+    且方法内的 super() 能沿 MRO 找到 BaseTool 的原始实现。
+    """
+
+    # 早期阶段集合：frozenset 成员判断 O(1)，且避免每次调用重建元组
+    _STAGE_RESET_KEYS = frozenset(("planning", "preprocessing", "terminology"))
 
-class PreprocessingTool(BaseTool, Base):
-    """预处理Tool"""
-    
-    def __init__(self, config: TaskConfig, workflow_state: Optional[Dict[str, Any]] = None):
-        BaseTool.__init__(self)
-        Base.__init__(self)
-        self.config = config
-        self.preprocessing_agent = PreprocessingAgent(config)
-        # 共享的工作流状态（由WorkflowManager注入），用于在Tool之间传递大对象（cache_project等）
-        self.workflow_state = workflow_state if workflow_state is not None else {}
-    
     def _update_stage_progress(self, cache_project: CacheProject, stage: str, current: int, total: int):
         """更新当前阶段的进度信息（用于预估时间）"""
-        import time
-        
         if not cache_project.stats_data:
             return
-        
+
+        entered_new_stage = False
         with cache_project.stats_data.atomic_scope():
             # 如果是新阶段，重置阶段开始时间
             if cache_project.stats_data.current_stage != stage:
                 cache_project.stats_data.current_stage = stage
                 cache_project.stats_data.stage_start_time = time.time()
-                self.debug(f"[PreprocessingTool] 进入新阶段: {stage}, 总进度={total}")
-            
+                entered_new_stage = True
+
             # 更新进度
             cache_project.stats_data.stage_progress_current = current
             cache_project.stats_data.stage_progress_total = total
-    
+
+        # 日志在锁外打，避免拉长临界区
+        if entered_new_stage and self.is_debug():
+            self.debug(f"{self._log_prefix} 进入新阶段: {stage}, 总进度={total}")
+
     def _publish_stage_with_stats(self, cache_project: CacheProject, stage: str, batch_info: str):
         """发送包含统计数据的阶段更新"""
-        import time
-        
         # 🔥 使用atomic_scope确保读取最新的统计数据
-        if cache_project.stats_data:
-            with cache_project.stats_data.atomic_scope():
+        stats_data = cache_project.stats_data
+        if stats_data:
+            with stats_data.atomic_scope():
                 # 🔥 更新已消耗时间（确保阶段更新时也同步时间）
-                cache_project.stats_data.time = time.time() - cache_project.stats_data.start_time
-            update_data = cache_project.stats_data.to_dict()
+                stats_data.time = time.time() - stats_data.start_time
+                # RLock 可重入：时间更新与快照共用同一临界区，格式化/发布在锁外进行
+                update_data = stats_data.snapshot()
         else:
             update_data = {}
-        
+
         # 🔥 早期阶段（任务规划、文件处理、实体识别）：已翻译行数应该保持为0
-        if stage in ["planning", "preprocessing", "terminology"]:
+        if stage in self._STAGE_RESET_KEYS:
             update_data["line"] = 0
-        
+
         # 🔥 添加阶段信息
         update_data["agent_stage"] = {
             "stage": stage,
             "batch_info": batch_info
         }
-        
-        self.debug(f"[PreprocessingTool] 发送完整更新: stage={stage}, batch_info={batch_info}, line={update_data.get('line', 0)}/{update_data.get('total_line', 0)}, time={update_data.get('time', 0):.1f}s")
-        self.emit(Base.EVENT.TASK_UPDATE, update_data)
-    
+
+        # 先判级再拼串：debug关闭时跳过 f-string / get / 浮点格式化的全部开销
+        if self.is_debug():
+            self.debug(f"{self._log_prefix} 发送完整更新: stage={stage}, batch_info={batch_info}, line={update_data.get('line', 0)}/{update_data.get('total_line', 0)}, time={update_data.get('time', 0):.1f}s")
+        self._emit_update(update_data)
+
     def to_activity_json_schema(self, activity, schema_id: str) -> dict:
-        """重写以修复 $schema 字段问题"""
+        """重写以修复 $schema 字段问题
+
+        结果按 (activity, schema_id) 缓存：schema 是静态的，
+        每次 LLM 工具调用无需重走一遍 schema 生成
+        """
+        cache = getattr(self, "_activity_schema_cache", None)
+        if cache is None:
+            cache = self._activity_schema_cache = {}
+        key = (getattr(activity, "__name__", str(activity)), schema_id)
+        schema = cache.get(key)
+        if schema is not None:
+            return schema
         schema = super().to_activity_json_schema(activity, schema_id)
         # 移除可能导致问题的 $schema 和 $id 字段（这些字段可能导致"relative URL without a base"错误）
-        if "$schema" in schema:
-            del schema["$schema"]
-        if "$id" in schema:
-            del schema["$id"]
+        schema.pop("$schema", None)
+        schema.pop("$id", None)
+        cache[key] = schema
         return schema
-    
+
+
+class PreprocessingTool(_StageProgressMixin, BaseTool, Base):
+    """预处理Tool"""
+
+    def __init__(self, config: TaskConfig, workflow_state: Optional[Dict[str, Any]] = None):
+        BaseTool.__init__(self)
+        Base.__init__(self)
+        self.config = config
+        self.preprocessing_agent = PreprocessingAgent(config)
+        # 共享的工作流状态（由WorkflowManager注入），用于在Tool之间传递大对象（cache_project等）
+        self.workflow_state = workflow_state if workflow_state is not None else {}
+        # 缓存日志前缀，避免每条日志重建
+        self._log_prefix = f"[{type(self).__name__}]"
+        # 预绑定事件发布回调，省去热路径上的多级属性查找
+        self._emit_update = functools.partial(self.emit, Base.EVENT.TASK_UPDATE)
+
     @activity(
         config={
             "description": "对文本进行预处理：文本结构拆解和语域风格识别。直接调用即可，工具会自动获取所需数据。",
-            "schema": Schema({}),
+            "schema": _EMPTY_SCHEMA,
         },
     )
     def preprocess_text(self, params: dict) -> TextArtifact:
         """执行预处理"""
         try:
             self.info(f"[PreprocessingTool] 接收到调用请求，params={params}")
-            self.info(f"[PreprocessingTool] workflow_state keys: {list(self.workflow_state.keys())}")
+            # 键列表仅用于诊断：debug关闭时连 list() 分配一起省掉
+            if self.is_debug():
+                self.debug(f"{self._log_prefix} workflow_state keys: {list(self.workflow_state.keys())}")
             
             cache_project: CacheProject = self.workflow_state.get("cache_project")
             if not cache_project:
@@ -203,95 +266,47 @@ class PreprocessingTool(BaseTool, Base):
 
             # 返回小结果，供调试/链路可见性
             metadata = self.workflow_state.get("metadata", {})
-            summary = {
-                "success": bool(result.get("success")),
-                "stage": "preprocess",
-                "domain": metadata.get("domain"),
-                "style": metadata.get("style"),
-            }
+            summary = PreprocSummary(
+                success=bool(result.get("success")),
+                stage="preprocess",
+                domain=metadata.get("domain"),
+                style=metadata.get("style"),
+            )
             
             self.info(f"[PreprocessingTool] 预处理完成: {summary}")
-            return TextArtifact(json.dumps(summary, ensure_ascii=False))
+            return TextArtifact(_SUMMARY_ENCODER.encode(summary).decode("utf-8"))
         except Exception as e:
             self.error(f"预处理工具执行失败: {e}", e)
             return ErrorArtifact(str(e))
 
 
-class TerminologyTool(BaseTool, Base):
+class TerminologyTool(_StageProgressMixin, BaseTool, Base):
     """术语识别Tool"""
-    
+
     def __init__(self, config: TaskConfig, workflow_state: Optional[Dict[str, Any]] = None):
         BaseTool.__init__(self)
         Base.__init__(self)
         self.config = config
         self.terminology_agent = TerminologyEntityAgent(config)
         self.workflow_state = workflow_state if workflow_state is not None else {}
-    
-    def _update_stage_progress(self, cache_project: CacheProject, stage: str, current: int, total: int):
-        """更新当前阶段的进度信息（用于预估时间）"""
-        import time
-        
-        if not cache_project.stats_data:
-            return
-        
-        with cache_project.stats_data.atomic_scope():
-            # 如果是新阶段，重置阶段开始时间
-            if cache_project.stats_data.current_stage != stage:
-                cache_project.stats_data.current_stage = stage
-                cache_project.stats_data.stage_start_time = time.time()
-                self.debug(f"[TerminologyTool] 进入新阶段: {stage}, 总进度={total}")
-            
-            # 更新进度
-            cache_project.stats_data.stage_progress_current = current
-            cache_project.stats_data.stage_progress_total = total
-    
-    def _publish_stage_with_stats(self, cache_project: CacheProject, stage: str, batch_info: str):
-        """发送包含统计数据的阶段更新"""
-        import time
-        
-        # 🔥 使用atomic_scope确保读取最新的统计数据
-        if cache_project.stats_data:
-            with cache_project.stats_data.atomic_scope():
-                # 🔥 更新已消耗时间（确保阶段更新时也同步时间）
-                cache_project.stats_data.time = time.time() - cache_project.stats_data.start_time
-            update_data = cache_project.stats_data.to_dict()
-        else:
-            update_data = {}
-        
-        # 🔥 早期阶段（任务规划、文件处理、实体识别）：已翻译行数应该保持为0
-        if stage in ["planning", "preprocessing", "terminology"]:
-            update_data["line"] = 0
-        
-        # 🔥 添加阶段信息
-        update_data["agent_stage"] = {
-            "stage": stage,
-            "batch_info": batch_info
-        }
-        
-        self.debug(f"[TerminologyTool] 发送完整更新: stage={stage}, batch_info={batch_info}, line={update_data.get('line', 0)}/{update_data.get('total_line', 0)}, time={update_data.get('time', 0):.1f}s")
-        self.emit(Base.EVENT.TASK_UPDATE, update_data)
-    
-    def to_activity_json_schema(self, activity, schema_id: str) -> dict:
-        """重写以修复 $schema 字段问题"""
-        schema = super().to_activity_json_schema(activity, schema_id)
-        # 移除可能导致问题的 $schema 和 $id 字段（这些字段可能导致"relative URL without a base"错误）
-        if "$schema" in schema:
-            del schema["$schema"]
-        if "$id" in schema:
-            del schema["$id"]
-        return schema
-    
+        # 缓存日志前缀，避免每条日志重建
+        self._log_prefix = f"[{type(self).__name__}]"
+        # 预绑定事件发布回调，省去热路径上的多级属性查找
+        self._emit_update = functools.partial(self.emit, Base.EVENT.TASK_UPDATE)
+
     @activity(
         config={
             "description": "识别术语和实体：NER、领域术语、文化负载词，并构建术语库。直接调用即可，工具会自动获取所需数据。",
-            "schema": Schema({}),
+            "schema": _EMPTY_SCHEMA,
         },
     )
     def identify_terminology(self, params: dict) -> TextArtifact:
         """执行术语识别"""
         try:
             self.info(f"[TerminologyTool] 接收到调用请求，params={params}")
-            self.info(f"[TerminologyTool] workflow_state keys: {list(self.workflow_state.keys())}")
+            # 键列表仅用于诊断：debug关闭时连 list() 分配一起省掉
+            if self.is_debug():
+                self.debug(f"{self._log_prefix} workflow_state keys: {list(self.workflow_state.keys())}")
             
             cache_project: CacheProject = self.workflow_state.get("cache_project")
             metadata = self.workflow_state.get("metadata", {}) or {}
@@ -326,104 +341,96 @@ class TerminologyTool(BaseTool, Base):
                     self.workflow_state["memory_storage"] = result.get("memory_storage", {})
 
             term_count = len(self.workflow_state.get("terminology_database", {}) or {})
-            summary = {
-                "success": bool(result.get("success")),
-                "stage": "terminology",
-                "terminology_count": term_count,
-            }
+            summary = TerminologySummary(
+                success=bool(result.get("success")),
+                stage="terminology",
+                terminology_count=term_count,
+            )
             
             self.info(f"[TerminologyTool] 术语识别完成: {summary}")
-            return TextArtifact(json.dumps(summary, ensure_ascii=False))
+            return TextArtifact(_SUMMARY_ENCODER.encode(summary).decode("utf-8"))
         except Exception as e:
             self.error(f"术语识别工具执行失败: {e}", e)
             return ErrorArtifact(str(e))
 
 
-class TranslationTool(BaseTool, Base):
+class TranslationTool(_StageProgressMixin, BaseTool, Base):
     """翻译Tool"""
-    
+
     def __init__(self, config: TaskConfig, workflow_state: Optional[Dict[str, Any]] = None):
         BaseTool.__init__(self)
         Base.__init__(self)
         self.config = config
         self.translation_agent = TranslationRefinementAgent(config)
         self.workflow_state = workflow_state if workflow_state is not None else {}
-    
-    def to_activity_json_schema(self, activity, schema_id: str) -> dict:
-        """重写以修复 $schema 字段问题"""
-        schema = super().to_activity_json_schema(activity, schema_id)
-        # 移除可能导致问题的 $schema 和 $id 字段（这些字段可能导致"relative URL without a base"错误）
-        if "$schema" in schema:
-            del schema["$schema"]
-        if "$id" in schema:
-            del schema["$id"]
-        return schema
-    
+        # 缓存日志前缀，避免每条日志重建
+        self._log_prefix = f"[{type(self).__name__}]"
+        # 预绑定事件发布回调，省去热路径上的多级属性查找
+        self._emit_update = functools.partial(self.emit, Base.EVENT.TASK_UPDATE)
+
     @activity(
         config={
             "description": "执行翻译和优化：多步骤翻译、多版本融合、回译验证。直接调用即可，工具会自动获取所需数据。",
-            "schema": Schema({}),
+            "schema": _EMPTY_SCHEMA,
         },
     )
     def translate_and_refine(self, params: dict) -> TextArtifact:
         """执行翻译和优化"""
         try:
             self.info(f"[TranslationTool] 接收到调用请求，params={params}")
-            self.info(f"[TranslationTool] workflow_state keys: {list(self.workflow_state.keys())}")
+            # 键列表仅用于诊断：debug关闭时连 list() 分配一起省掉
+            if self.is_debug():
+                self.debug(f"{self._log_prefix} workflow_state keys: {list(self.workflow_state.keys())}")
             
+            # 工作流状态字典在整个调用期间只取一次属性引用
+            ws = self.workflow_state
+
             # 检查是否已经翻译完成（防止重复调用）
-            if self.workflow_state.get("did_translate"):
-                translated_count = len(self.workflow_state.get("translation_results", []) or [])
+            if ws.get("did_translate"):
+                translated_count = len(ws.get("translation_results") or [])
                 self.info(f"[TranslationTool] 翻译已完成（{translated_count}个单元），直接返回结果")
-                summary = {
-                    "success": True,
-                    "stage": "translate",
-                    "translated_count": translated_count,
-                    "message": "翻译已完成，无需重复执行"
-                }
-                return TextArtifact(json.dumps(summary, ensure_ascii=False))
+                summary = TranslationSummary(
+                    success=True,
+                    stage="translate",
+                    translated_count=translated_count,
+                    message="翻译已完成，无需重复执行"
+                )
+                return TextArtifact(_SUMMARY_ENCODER.encode(summary).decode("utf-8"))
             
-            cache_project: CacheProject = self.workflow_state.get("cache_project")
+            cache_project: CacheProject = ws.get("cache_project")
             if not cache_project:
                 self.error("[TranslationTool] workflow_state中缺少cache_project")
-                self.error(f"[TranslationTool] workflow_state内容: {self.workflow_state}")
+                self.error(f"[TranslationTool] workflow_state内容: {ws}")
                 return ErrorArtifact("workflow_state中缺少cache_project（请检查WorkflowManager注入）")
 
             self.info("[TranslationTool] 开始执行翻译和优化")
-            
-            terminology_db = self.workflow_state.get("terminology_database", {}) or {}
-            memory_storage = self.workflow_state.get("memory_storage", {}) or {}
-            progress_callback = self.workflow_state.get("progress_callback")  # 获取进度回调
-            planning_result = self.workflow_state.get("planning_result", {})  # 获取规划结果
-            task_memory = self.workflow_state.get("task_memory", {})  # 获取任务元数据（chunk策略、实体数据库等）
-            human_intervention_callback = self.workflow_state.get("human_intervention_callback")  # 🔥 获取人工介入回调
 
             result = self.translation_agent.execute({
                 "cache_project": cache_project,
-                "terminology_database": terminology_db,
-                "memory_storage": memory_storage,
-                "human_intervention_callback": human_intervention_callback,  # 🔥 传递人工介入回调
-                "progress_callback": progress_callback,  # 传递进度回调
-                "planning_result": planning_result,  # 🔥 传递规划结果（包含max_workers等配置）
-                "task_memory": task_memory,  # 🔥 传递任务元数据（chunk策略、实体数据库等）
+                "terminology_database": ws.get("terminology_database") or {},
+                "memory_storage": ws.get("memory_storage") or {},
+                "human_intervention_callback": ws.get("human_intervention_callback"),  # 🔥 人工介入回调
+                "progress_callback": ws.get("progress_callback"),  # 进度回调
+                "planning_result": ws.get("planning_result", {}),  # 🔥 规划结果（包含max_workers等配置）
+                "task_memory": ws.get("task_memory", {}),  # 🔥 任务元数据（chunk策略、实体数据库等）
             })
 
             if isinstance(result, dict):
                 if result.get("cache_project"):
-                    self.workflow_state["cache_project"] = result["cache_project"]
+                    ws["cache_project"] = result["cache_project"]
                 # 标记是否发生翻译（用于WorkflowManager判定成功）
-                self.workflow_state["did_translate"] = bool(result.get("success"))
-                self.workflow_state["translation_results"] = result.get("translation_results", [])
-
-            translated_count = len(self.workflow_state.get("translation_results", []) or [])
-            summary = {
-                "success": bool(result.get("success")),
-                "stage": "translate",
-                "translated_count": translated_count,
-            }
+                ws["did_translate"] = bool(result.get("success"))
+                ws["translation_results"] = result.get("translation_results", [])
+
+            translated_count = len(ws.get("translation_results") or [])
+            summary = TranslationSummary(
+                success=bool(result.get("success")),
+                stage="translate",
+                translated_count=translated_count,
+            )
             
             self.info(f"[TranslationTool] 翻译完成: {summary}")
-            return TextArtifact(json.dumps(summary, ensure_ascii=False))
+            return TextArtifact(_SUMMARY_ENCODER.encode(summary).decode("utf-8"))
         except Exception as e:
             self.error(f"翻译工具执行失败: {e}", e)
             return ErrorArtifact(str(e))
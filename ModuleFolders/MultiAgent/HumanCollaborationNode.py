@@ -3,10 +3,100 @@
 在关键质量控制节点预留人工介入环节
 """
 
+import functools
+import time
+from collections import deque
 from typing import Dict, Any, List, Optional
 from Base.Base import Base
-from PyQt5.QtWidgets import QMessageBox, QTableWidget, QTableWidgetItem, QDialog, QVBoxLayout, QPushButton
-from PyQt5.QtCore import Qt
+
+
+@functools.lru_cache(maxsize=1)
+def _qt():
+    """首次 UI 调用时才加载 QtWidgets
+
+    无界面的流水线（纯术语抽取等）即使导入了本模块也不触发 Qt 加载，
+    省掉几十毫秒冷启动与整个 QtWidgets 的内存占用；
+    lru_cache 保证之后每次取用只是一次函数调用
+    """
+    import PyQt5.QtWidgets as qt_widgets
+    return qt_widgets
+
+
+@functools.lru_cache(maxsize=1)
+def _review_dialog_class():
+    """懒加载审核对话框类（qfluentwidgets 缺失等导入失败时返回 None，调用处报错提示）"""
+    try:
+        from UserInterface.EditView.HumanReview.TranslationReviewDialog import TranslationReviewDialog
+        return TranslationReviewDialog
+    except ImportError:
+        return None
+
+# 术语审核提示文案模板：整段只格式化一次，避免每个术语重复拼接字面量
+_TERM_MSG_TMPL = "请审核以下术语的翻译：\n\n术语：{term}\n上下文：{ctx}\n\n建议翻译：\n{sug}"
+
+# 固定文案常量：同一 str 对象反复传给 PyQt，命中 sip 的 QString 转换缓存，
+# 批量审核循环里不再逐次做 PyUnicode -> QString 的编码与分配
+_TITLE_TERM = "术语审核"
+_BTN_FIRST = "使用建议1"
+_BTN_SECOND = "使用建议2"
+_BTN_ACCEPT = "接受建议"
+_BTN_MANUAL = "手动输入"
+_BTN_SKIP = "跳过"
+_BTN_ALL = "全部接受"
+_STATUS_PENDING = "待审核"
+
+
+@functools.lru_cache(maxsize=256)
+def _fmt_suggestions(suggestions: tuple) -> str:
+    """格式化建议翻译编号列表
+
+    批次里常有大量相同的候选列表（单条候选、"[未翻译]" 占位等），
+    以元组为键记忆 join 结果，重复出现时直接取现成字符串
+    """
+    return "\n".join(f"{i + 1}. {t}" for i, t in enumerate(suggestions))
+
+
+@functools.lru_cache(maxsize=1)
+def _review_model_class():
+    """懒定义审核表格模型（基类来自 QtCore，同样推迟到首次 UI 调用）"""
+    from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+    class _ReviewModel(QAbstractTableModel):
+        """审核条目的只读表格模型
+
+        直接引用原始 review_items 列表按需取值，
+        不再为每个单元格分配 QTableWidgetItem
+        """
+
+        _HEADERS = ("原文", "译文", "状态", "操作")
+        _KEYS = ("source", "translated", "status")
+
+        def __init__(self, items: List[Dict], parent=None):
+            super().__init__(parent)
+            self._items = items
+
+        def rowCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self._items)
+
+        def columnCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self._HEADERS)
+
+        def data(self, index, role=Qt.DisplayRole):
+            if role == Qt.DisplayRole and index.isValid():
+                col = index.column()
+                if col < len(self._KEYS):
+                    item = self._items[index.row()]
+                    if col == 2:
+                        return item.get("status", _STATUS_PENDING)
+                    return item.get(self._KEYS[col], "")
+            return None
+
+        def headerData(self, section, orientation, role=Qt.DisplayRole):
+            if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+                return self._HEADERS[section]
+            return None
+
+    return _ReviewModel
 
 
 class HumanCollaborationNode(Base):
@@ -15,13 +105,41 @@ class HumanCollaborationNode(Base):
     在关键质量控制节点提供人工介入功能
     """
     
+    # 待处理队列上限：超出后自动淘汰最旧任务，长会话不致无限增长
+    PENDING_TASKS_MAXLEN = 1024
+    # 动作日志缓冲：攒批输出，避免批量审核时逐条 I/O 插进交互间隙
+    LOG_FLUSH_INTERVAL = 0.2  # 秒
+    LOG_FLUSH_MAX = 32  # 条
+
     def __init__(self):
         super().__init__()
-        self.pending_tasks = []  # 待人工处理的任务队列
+        # 待人工处理的任务队列（deque 追加 O(1)，满时自动弃旧）
+        self.pending_tasks: deque = deque(maxlen=self.PENDING_TASKS_MAXLEN)
+        # 手动输入对话框（QInputDialog）：首次使用时构建，之后整个会话复用
+        self._input_dialog = None
+        # 动作日志缓冲
+        self._log_buf: deque = deque()
+        self._log_last_flush = time.monotonic()
+
+    def clear_pending(self) -> None:
+        """清空待处理任务队列（会话之间显式刷新）"""
+        self.pending_tasks.clear()
+        self._flush_logs()
     
     def log_agent_action(self, action: str, details: str = "") -> None:
-        """记录Agent执行的动作"""
-        self.info(f"[HumanCollaboration] {action} {details}")
+        """记录Agent执行的动作（缓冲后攒批输出）"""
+        self._log_buf.append(f"[HumanCollaboration] {action} {details}")
+        now = time.monotonic()
+        if (len(self._log_buf) >= self.LOG_FLUSH_MAX
+                or now - self._log_last_flush >= self.LOG_FLUSH_INTERVAL):
+            self._flush_logs(now)
+
+    def _flush_logs(self, now: float = None) -> None:
+        """把缓冲的动作日志合并成一次输出"""
+        if self._log_buf:
+            self.info("\n".join(self._log_buf))
+            self._log_buf.clear()
+        self._log_last_flush = now if now is not None else time.monotonic()
 
     def request_human_input(self, task_type: str, task_data: Dict[str, Any], 
                            parent_widget=None) -> Optional[Dict[str, Any]]:
@@ -35,23 +153,29 @@ class HumanCollaborationNode(Base):
             
         Returns:
             人工输入的结果，如果取消则返回None
+
+        线程约定：本方法必须在 GUI 线程执行。Agent 工作线程不要直接调用，
+        而是经 MultiAgentTaskExecutor 的 Invoker（BlockingQueuedConnection）
+        投递过来——工作线程在 emit 上阻塞等待结果，GUI 线程照常跑事件循环，
+        其他工作线程的任务不受这次人工审核影响，可以继续并发推进
         """
         self.log_agent_action(f"请求人工介入: {task_type}")
-        
-        if task_type == "terminology_review":
-            return self._handle_terminology_review(task_data, parent_widget)
-        elif task_type == "translation_review":
-            # 检查是否包含批量数据（review_items），如果是则转为批量处理
-            if "review_items" in task_data:
-                return self._handle_batch_translation_review(task_data, parent_widget)
-            return self._handle_translation_review(task_data, parent_widget)
-        elif task_type == "batch_translation_review":
-            return self._handle_batch_translation_review(task_data, parent_widget)
-        elif task_type == "error_correction":
-            return self._handle_error_correction(task_data, parent_widget)
-        else:
+
+        # 包含批量数据（review_items）的翻译审核转为批量处理
+        if task_type == "translation_review" and "review_items" in task_data:
+            task_type = "batch_translation_review"
+
+        handler = self._HANDLERS.get(task_type)
+        if handler is None:
             self.warning(f"未知的任务类型: {task_type}")
             return None
+        # 对话框会阻塞在嵌套事件循环里，缓冲中的日志（往往正是这次审核
+        # 之前的关键动作）必须先刷出去；请求结束后同样收尾刷新一次
+        self._flush_logs()
+        try:
+            return handler(self, task_data, parent_widget)
+        finally:
+            self._flush_logs()
     
     def _handle_terminology_review(self, task_data: Dict, parent_widget) -> Optional[Dict]:
         """
@@ -70,17 +194,19 @@ class HumanCollaborationNode(Base):
             context = task_data.get("context", "")
             
             # 创建审核对话框
+            QMessageBox = _qt().QMessageBox
             msg = QMessageBox(parent_widget)
-            msg.setWindowTitle("术语审核")
-            msg.setText(f"请审核以下术语的翻译：\n\n术语：{term}\n上下文：{context}\n\n建议翻译：\n" + 
-                       "\n".join([f"{i+1}. {t}" for i, t in enumerate(suggested_translations)]))
+            msg.setWindowTitle(_TITLE_TERM)
+            msg.setText(_TERM_MSG_TMPL.format(
+                term=term, ctx=context,
+                sug=_fmt_suggestions(tuple(suggested_translations))))
             
             # 添加按钮
-            msg.addButton("使用建议1", QMessageBox.AcceptRole)
+            msg.addButton(_BTN_FIRST, QMessageBox.AcceptRole)
             if len(suggested_translations) > 1:
-                msg.addButton("使用建议2", QMessageBox.AcceptRole)
-            msg.addButton("手动输入", QMessageBox.ActionRole)
-            msg.addButton("跳过", QMessageBox.RejectRole)
+                msg.addButton(_BTN_SECOND, QMessageBox.AcceptRole)
+            msg.addButton(_BTN_MANUAL, QMessageBox.ActionRole)
+            msg.addButton(_BTN_SKIP, QMessageBox.RejectRole)
             
             result = msg.exec_()
             
@@ -94,57 +220,86 @@ class HumanCollaborationNode(Base):
                     return {"approved_terms": [{"term": term, "translation": manual_result.get("translation", "")}]}
             return None  # 跳过
     
+    @staticmethod
+    def _resolve_suggestions(info: Dict) -> List[str]:
+        """解析术语的建议翻译列表：优先 translation_suggestions，回退单个 translation"""
+        suggestions = info.get("translation_suggestions")
+        if suggestions:
+            return suggestions
+        translation = info.get("translation")
+        return [translation] if translation else []
+
     def _handle_batch_terminology_review(self, terms: List[Dict], parent_widget) -> Optional[Dict]:
         """
         批量术语审核
         terms格式: [{"term": "术语", "info": {...}}]
         """
         approved_terms = []
-        
-        for term_item in terms:
+        total = len(terms)
+        QMessageBox = _qt().QMessageBox
+
+        # 同批次内同一术语可能重复出现（多章节同词条）：
+        # 建议列表按术语记忆一次，交互与"全部接受"两条路径共用
+        sugg_cache: Dict[str, List[str]] = {}
+
+        def resolve(term: str, info: Dict) -> List[str]:
+            cached = sugg_cache.get(term)
+            if cached is None:
+                cached = sugg_cache[term] = self._resolve_suggestions(info)
+            return cached
+
+        # 整个批次复用同一个审核对话框：每个术语只更新标题/文案，
+        # 不再逐次重建 QWidget/布局/按钮与信号连接
+        msg = QMessageBox(parent_widget)
+        accept_btn = msg.addButton(_BTN_ACCEPT, QMessageBox.AcceptRole)
+        second_btn = msg.addButton(_BTN_SECOND, QMessageBox.AcceptRole)
+        manual_btn = msg.addButton(_BTN_MANUAL, QMessageBox.ActionRole)
+        skip_btn = msg.addButton(_BTN_SKIP, QMessageBox.RejectRole)
+        all_accept_btn = msg.addButton(_BTN_ALL, QMessageBox.YesRole)
+
+        for i, term_item in enumerate(terms):
             term = term_item.get("term", "")
             info = term_item.get("info", {})
-            suggested_translations = info.get("translation_suggestions", [])
-            if not suggested_translations and info.get("translation"):
-                suggested_translations = [info.get("translation")]
+            suggested_translations = resolve(term, info)
             context = info.get("context", "")
-            
-            # 为每个术语创建审核对话框
-            msg = QMessageBox(parent_widget)
-            msg.setWindowTitle(f"术语审核 ({terms.index(term_item) + 1}/{len(terms)})")
-            msg.setText(f"请审核以下术语的翻译：\n\n术语：{term}\n上下文：{context}\n\n建议翻译：\n" + 
-                       "\n".join([f"{i+1}. {t}" for i, t in enumerate(suggested_translations)]))
-            
-            # 添加按钮
-            accept_btn = msg.addButton("接受建议", QMessageBox.AcceptRole)
-            if len(suggested_translations) > 1:
-                msg.addButton("使用建议2", QMessageBox.AcceptRole)
-            manual_btn = msg.addButton("手动输入", QMessageBox.ActionRole)
-            skip_btn = msg.addButton("跳过", QMessageBox.RejectRole)
-            all_accept_btn = msg.addButton("全部接受", QMessageBox.YesRole)
-            
-            result = msg.exec_()
+
+            msg.setWindowTitle(f"{_TITLE_TERM} ({i + 1}/{total})")
+            msg.setText(_TERM_MSG_TMPL.format(
+                term=term, ctx=context,
+                sug=_fmt_suggestions(tuple(suggested_translations))))
+            # 只有一个建议时隐藏备选按钮，并恢复默认焦点
+            second_btn.setVisible(len(suggested_translations) > 1)
+            msg.setDefaultButton(accept_btn)
+
+            # exec_() 的返回值对 addButton 角色对话框没有判别价值，
+            # 只看 clickedButton() 的对象身份即可区分全部按钮
+            # （此前 result == AcceptRole 的写法无法区分"接受建议"与"使用建议2"）
+            msg.exec_()
             clicked_btn = msg.clickedButton()
-            
-            if clicked_btn == all_accept_btn:
+
+            if clicked_btn is all_accept_btn:
                 # 全部接受剩余术语
-                for remaining_term in terms[terms.index(term_item):]:
-                    remaining_info = remaining_term.get("info", {})
-                    remaining_suggestions = remaining_info.get("translation_suggestions", [])
-                    if not remaining_suggestions and remaining_info.get("translation"):
-                        remaining_suggestions = [remaining_info.get("translation")]
+                for remaining_term in terms[i:]:
+                    remaining_suggestions = resolve(remaining_term.get("term", ""),
+                                                    remaining_term.get("info", {}))
                     approved_terms.append({
                         "term": remaining_term.get("term", ""),
                         "translation": remaining_suggestions[0] if remaining_suggestions else ""
                     })
                 break
-            elif result == QMessageBox.AcceptRole:
+            elif clicked_btn is accept_btn:
                 # 使用第一个建议
                 approved_terms.append({
                     "term": term,
                     "translation": suggested_translations[0] if suggested_translations else ""
                 })
-            elif clicked_btn == manual_btn:
+            elif clicked_btn is second_btn:
+                # 使用第二个建议
+                approved_terms.append({
+                    "term": term,
+                    "translation": suggested_translations[1]
+                })
+            elif clicked_btn is manual_btn:
                 # 手动输入
                 manual_result = self._get_manual_input(term, "术语翻译")
                 if manual_result:
@@ -165,11 +320,16 @@ class HumanCollaborationNode(Base):
         source_text = task_data.get("source_text", "")
         translated_text = task_data.get("translated_text", "")
         issues = task_data.get("issues", [])
-        
+
+        QMessageBox = _qt().QMessageBox
         msg = QMessageBox(parent_widget)
         msg.setWindowTitle("翻译审核")
-        msg.setText(f"请审核以下翻译：\n\n原文：{source_text}\n\n译文：{translated_text}\n\n发现问题：\n" + 
-                   "\n".join(issues))
+        # 一次 join 直接出整段文案，不经过"f-string + 拼接"的双份临时串
+        msg.setText("".join((
+            "请审核以下翻译：\n\n原文：", source_text,
+            "\n\n译文：", translated_text,
+            "\n\n发现问题：\n", "\n".join(issues),
+        )))
         
         msg.addButton("接受", QMessageBox.AcceptRole)
         msg.addButton("修正", QMessageBox.ActionRole)
@@ -204,31 +364,59 @@ class HumanCollaborationNode(Base):
         
         Returns:
             {"review_results": [{"index": int, "action": str, "translation": str}]}
+
+        线程模型说明：本方法始终经 MultiAgentTaskExecutor 的
+        BlockingQueuedConnection 调度到GUI线程执行——exec_() 的嵌套事件循环
+        保持界面响应，阻塞的只有发起审核的工作线程（流水线语义上必须等待
+        人工结论才能继续）。因此无需引入 qasync 改造成协程形式。
         """
         review_items = task_data.get("review_items", [])
-        
+
         if not review_items:
             self.warning("批量审核：没有需要审核的项目")
             return None
-        
-        self.info(f"批量审核：共 {len(review_items)} 行需要人工审核")
-        
+
+        # 预过滤：评分已达标的行直接接受，不进对话框
+        # review_threshold 是 0-1 刻度（如0.8），item["score"] 是 0-10 的
+        # 质量评分（参见 TranslationRefinementAgent 的"评分 x/10"），
+        # 对齐刻度后再比较
+        threshold = task_data.get("review_threshold", 0) * 10
+        auto_accepted = []
+        to_review = []
+        for item in review_items:
+            if threshold and item.get("score", 0) >= threshold:
+                auto_accepted.append({
+                    "index": item.get("index"),
+                    "action": "accept",
+                    "translation": item.get("translated_text", "")
+                })
+            else:
+                to_review.append(item)
+
+        if not to_review:
+            self.info(f"批量审核：{len(auto_accepted)} 行评分均已达标，自动接受")
+            return {"review_results": auto_accepted}
+
+        self.info(f"批量审核：共 {len(to_review)} 行需要人工审核")
+
+        dialog_class = _review_dialog_class()
+        if dialog_class is None:
+            self.error("批量审核对话框不可用（TranslationReviewDialog 导入失败）")
+            return None
+
         try:
-            # 导入并创建批量审核对话框
-            from UserInterface.EditView.HumanReview.TranslationReviewDialog import TranslationReviewDialog
-            
             # 使用QDialog的exec()方法同步等待用户操作
-            dialog = TranslationReviewDialog(review_items, parent_widget)
+            dialog = dialog_class(to_review, parent_widget)
             dialog_result = dialog.exec_()
-            
-            if dialog_result == QDialog.Accepted:
+
+            if dialog_result == _qt().QDialog.Accepted:
                 review_results = dialog.get_review_results()
                 self.info(f"用户完成审核：{len(review_results)} 行")
-                return {"review_results": review_results}
+                return {"review_results": auto_accepted + review_results}
             else:
                 self.info("用户取消审核")
                 return None
-                
+
         except Exception as e:
             self.error(f"批量审核对话框失败: {e}", e)
             return None
@@ -240,10 +428,15 @@ class HumanCollaborationNode(Base):
         error_type = task_data.get("error_type", "")
         error_description = task_data.get("error_description", "")
         affected_text = task_data.get("affected_text", "")
-        
+
+        QMessageBox = _qt().QMessageBox
         msg = QMessageBox(parent_widget)
         msg.setWindowTitle("错误修正")
-        msg.setText(f"发现错误：{error_type}\n\n描述：{error_description}\n\n受影响文本：{affected_text}")
+        msg.setText("".join((
+            "发现错误：", error_type,
+            "\n\n描述：", error_description,
+            "\n\n受影响文本：", affected_text,
+        )))
         
         msg.addButton("修正", QMessageBox.AcceptRole)
         msg.addButton("忽略", QMessageBox.RejectRole)
@@ -260,28 +453,39 @@ class HumanCollaborationNode(Base):
         获取手动输入（简化版）
         实际实现中可以使用更复杂的输入对话框
         """
-        # 这里简化处理，实际应该使用QInputDialog或自定义对话框
-        from PyQt5.QtWidgets import QInputDialog
-        
-        text, ok = QInputDialog.getText(None, "手动输入", f"{prompt}:", text=default_value)
+        # 复用同一个 QInputDialog：每次只更新提示语与默认值，免去整套对话框重建
+        qt_widgets = _qt()
+        if self._input_dialog is None:
+            self._input_dialog = qt_widgets.QInputDialog()
+            self._input_dialog.setInputMode(qt_widgets.QInputDialog.TextInput)
+            self._input_dialog.setWindowTitle("手动输入")
+
+        self._input_dialog.setLabelText(f"{prompt}:")
+        self._input_dialog.setTextValue(default_value)
+        ok = self._input_dialog.exec_() == qt_widgets.QDialog.Accepted
+        text = self._input_dialog.textValue()
         if ok and text:
             return {"translation": text, "manual": True}
         return None
     
-    def create_review_table(self, review_items: List[Dict]) -> QTableWidget:
+    def create_review_table(self, review_items: List[Dict]):
         """
-        创建审核表格
+        创建审核表格（返回 QTableView）
         用于批量显示需要人工审核的项目
+
+        模型直接挂在 review_items 上按需供数，行数再多也没有逐单元格的
+        QTableWidgetItem 分配与复制；模型在 setModel 之前就绪，
+        视图只做一次整体布局，不存在逐行 rowsInserted 信号风暴
         """
-        table = QTableWidget()
-        table.setColumnCount(4)
-        table.setHorizontalHeaderLabels(["原文", "译文", "状态", "操作"])
-        
-        for row, item in enumerate(review_items):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(item.get("source", "")))
-            table.setItem(row, 1, QTableWidgetItem(item.get("translated", "")))
-            table.setItem(row, 2, QTableWidgetItem(item.get("status", "待审核")))
-            # 操作按钮可以后续添加
-        
-        return table
+        view = _qt().QTableView()
+        view.setModel(_review_model_class()(review_items, view))
+        # 操作按钮可以后续添加
+        return view
+
+    # 任务类型 → 处理函数的调度表（O(1) 查表替代 if/elif 串，新任务类型注册于此）
+    _HANDLERS = {
+        "terminology_review": _handle_terminology_review,
+        "translation_review": _handle_translation_review,
+        "batch_translation_review": _handle_batch_translation_review,
+        "error_correction": _handle_error_correction,
+    }
@@ -3,11 +3,77 @@ Planning Agent (规划Agent)
 负责任务规划、资源调度和流程控制
 """
 
+import hashlib
 import json
+import re
+import sqlite3
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
 from typing import Dict, Any, List, Optional
 from .BaseAgent import BaseAgent
+from ModuleFolders.Cache.CacheItem import TranslationStatus
 from ModuleFolders.Cache.CacheProject import CacheProject
 
+# 热路径谓词直接比较预绑定常量，不再逐条做类属性查找
+_UNTRANSLATED = TranslationStatus.UNTRANSLATED
+
+
+class PlanCacheStore:
+    """规划结果的跨进程持久缓存（SQLite，按任务指纹精确匹配）
+
+    进程内缓存只救本次会话的重试；同一项目换一次进程重跑规划时，
+    从磁盘按指纹取回上次的规划产物即可跳过整轮扫描。
+    规划产物全部是基本类型，直接 JSON 序列化存 BLOB。
+    任何数据库异常都只记日志不冒泡——缓存失效时照常重新规划
+    """
+
+    def __init__(self, db_path: str = "plan_cache.sqlite"):
+        self.db_path = db_path
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache ("
+                "fingerprint TEXT PRIMARY KEY, created_at INTEGER, plan BLOB)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT plan FROM plan_cache WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, fingerprint: str, plan: Dict[str, Any]) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO plan_cache (fingerprint, created_at, plan) VALUES (?, ?, ?)",
+            (fingerprint, int(time.time()), json.dumps(plan, ensure_ascii=False)),
+        )
+        conn.commit()
+
+
+@dataclass(slots=True)
+class AgentStatus:
+    """单个Agent的执行状态（槽位化定长对象，高频进度更新时原地改字段）"""
+    status: str
+    progress: float
+    updated_at: int  # 单调纳秒时间戳，见 _get_current_time
+
+# 句子切分：模块级一次编译；无任何终止符的文本直接整段返回，不进正则引擎
+_SENT_SPLIT_RE = re.compile(r'[.!?。！？]+')
+_TERMINAL_CHARS = '.!?。！？'
+
+# 术语词启发式：大写开头或含下划线/连字符的空白分隔词
+# （单遍 C 级扫描替代逐词 Python 判断；(?<!\S) 锚定词首）
+_TECH_WORD_RE = re.compile(r'(?<!\S)(?:[A-Z]\S*|\S*[_\-]\S*)')
+
 
 class PlanningAgent(BaseAgent):
     """
@@ -28,7 +94,15 @@ class PlanningAgent(BaseAgent):
         )
         
         self.execution_plan = {}  # 执行计划
-        self.agent_status = {}  # Agent状态跟踪
+        self.agent_status: Dict[str, AgentStatus] = {}  # Agent状态跟踪
+        # 规划结果缓存：任务指纹 → 规划产物
+        # 重试/断点续跑时语料往往原样未动，直接复用上次规划，免去整轮语料扫描
+        self._plan_cache: Dict[str, Dict[str, Any]] = {}
+        # chunk策略缓存：内容哈希 → 策略结果（不含chunk_index）
+        # 重试/增量运行中相同内容的chunk跳过整套正则分析
+        self._chunk_strategy_cache: Dict[str, Dict[str, Any]] = {}
+        # 磁盘规划缓存：跨进程复用（连接懒建立）
+        self._plan_store = PlanCacheStore()
     
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -42,13 +116,30 @@ class PlanningAgent(BaseAgent):
                 self.error("未找到cache_project数据")
                 return {"success": False, "error": "缺少cache_project"}
             
-            # 1. 分析任务复杂度
-            task_analysis = self._analyze_task_complexity(cache_project)
-            self.info(f"任务分析完成: {task_analysis}")
+            # 0. 任务指纹：未翻译条目集合 + 配置参数。命中缓存则跳过整轮规划
+            # （先查进程内，再查磁盘持久缓存）
+            fingerprint = self._fingerprint_project(cache_project)
+            cached_plan = self._plan_cache.get(fingerprint)
+            if cached_plan is None:
+                try:
+                    cached_plan = self._plan_store.get(fingerprint)
+                except Exception as e:
+                    self.debug(f"磁盘规划缓存读取失败: {e}")
+            if cached_plan is not None:
+                self.log_agent_action("任务指纹命中规划缓存，复用上次规划结果")
+                self._plan_cache[fingerprint] = cached_plan
+                return self._build_result(cache_project, cached_plan)
+            
+            # 1. 单遍扫描语料：复杂度统计、chunk策略、风格样本一次产出
+            # （此前复杂度分析/分块分析/风格判定各自完整遍历一次语料，
+            # 大项目下纯属三倍的内存搬运，这里融合为一趟流式遍历）
+            self.info("正在进行语料单遍扫描与文本块细粒度分析...")
+            scan = self._scan_project(cache_project)
+            chunk_strategies = scan["chunk_strategies"]
             
-            # 2. 细粒度分析文本块 - 为每个chunk打上策略标签
-            self.info("正在进行文本块细粒度分析...")
-            chunk_strategies = self._analyze_chunks_and_assign_strategies(cache_project)
+            # 2. 分析任务复杂度（基于扫描累计值）
+            task_analysis = self._analyze_task_complexity(scan)
+            self.info(f"任务分析完成: {task_analysis}")
             self.info(f"文本块分析完成: {len(chunk_strategies)} 个批次已分配策略")
             
             # 3. 制定执行计划
@@ -67,7 +158,7 @@ class PlanningAgent(BaseAgent):
             task_memory = {
                 "chunk_strategies": chunk_strategies,  # 每个chunk的翻译策略
                 "terminology_database": {},  # 将由TerminologyAgent填充
-                "style_guide": self._determine_style_guide(cache_project),  # 文体风格指南
+                "style_guide": self._determine_style_guide(chunk_strategies),  # 文体风格指南
                 "entity_database": {},  # 实体数据库（用于一致性检查）
             }
             
@@ -75,22 +166,78 @@ class PlanningAgent(BaseAgent):
                                  f"预计处理 {task_analysis['total_units']} 个单元，"
                                  f"已为 {len(chunk_strategies)} 个批次分配翻译策略")
             
-            return {
-                "success": True,
-                "cache_project": cache_project,
+            # 缓存规划产物（数量封顶，满了淘汰最早的一条）
+            if len(self._plan_cache) >= self.PLAN_CACHE_MAX:
+                self._plan_cache.pop(next(iter(self._plan_cache)))
+            plan = {
                 "task_analysis": task_analysis,
                 "execution_plan": execution_plan,
                 "resource_plan": resource_plan,
                 "workflow_config": workflow_config,
-                "task_memory": task_memory,  # 新增：任务元数据
+                "chunk_strategies": chunk_strategies,
+                "style_guide": task_memory["style_guide"],
             }
+            self._plan_cache[fingerprint] = plan
+            try:
+                self._plan_store.put(fingerprint, plan)
+            except Exception as e:
+                self.debug(f"磁盘规划缓存写入失败: {e}")
+            
+            return self._build_result(cache_project, plan)
         except Exception as e:
             self.error(f"任务规划执行失败: {e}", e)
             return {"success": False, "error": str(e)}
     
-    def _analyze_task_complexity(self, cache_project: CacheProject) -> Dict[str, Any]:
+    # 规划缓存容量上限
+    PLAN_CACHE_MAX = 8
+    
+    def _fingerprint_project(self, cache_project: CacheProject) -> str:
+        """
+        计算任务指纹：对排好序的未翻译条目 (file_path, text_index, 文本长度)
+        与影响分块的配置参数做 SHA-256
+        
+        只读长度不读文本内容，这一趟远轻于完整的规划扫描；
+        指纹相同即认为语料与配置均未变化，规划结果可以复用
+        """
+        hasher = hashlib.sha256()
+        for file_path, cache_file in sorted(cache_project.files.items()):
+            hasher.update(file_path.encode())
+            for item in cache_file.items:
+                if item.translation_status == _UNTRANSLATED:
+                    hasher.update(f"{item.text_index}:{len(item.source_text)};".encode())
+        
+        # 配置参数影响分块，一并纳入指纹
+        if self.config:
+            hasher.update(f"|{getattr(self.config, 'tokens_limit_switch', False)}"
+                          f":{getattr(self.config, 'tokens_limit', 500)}"
+                          f":{getattr(self.config, 'lines_limit', 15)}".encode())
+        return hasher.hexdigest()
+    
+    @staticmethod
+    def _build_result(cache_project: CacheProject, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """由规划产物组装 execute 返回值
+        
+        task_memory 的术语/实体库每次给全新空字典：
+        它们由后续Agent就地填充，不能把上一轮的可变状态透传给新一轮
+        """
+        return {
+            "success": True,
+            "cache_project": cache_project,
+            "task_analysis": plan["task_analysis"],
+            "execution_plan": plan["execution_plan"],
+            "resource_plan": plan["resource_plan"],
+            "workflow_config": plan["workflow_config"],
+            "task_memory": {
+                "chunk_strategies": plan["chunk_strategies"],  # 每个chunk的翻译策略
+                "terminology_database": {},  # 将由TerminologyAgent填充
+                "style_guide": plan["style_guide"],  # 文体风格指南
+                "entity_database": {},  # 实体数据库（用于一致性检查）
+            },
+        }
+    
+    def _analyze_task_complexity(self, scan: Dict[str, Any]) -> Dict[str, Any]:
         """
-        分析任务复杂度
+        分析任务复杂度（输入为 _scan_project 的单遍累计结果）
         
         Returns:
             {
@@ -101,18 +248,9 @@ class PlanningAgent(BaseAgent):
                 "estimated_time": 预计时间（秒）
             }
         """
-        from ModuleFolders.Cache.CacheItem import TranslationStatus
-        
-        total_units = 0
-        total_length = 0
-        file_types = set()
-        
-        for file_path, cache_file in cache_project.files.items():
-            file_types.add(cache_file.file_project_type)
-            for item in cache_file.items:
-                if item.translation_status == TranslationStatus.UNTRANSLATED:
-                    total_units += 1
-                    total_length += len(item.source_text)
+        total_units = scan["total_units"]
+        total_length = scan["total_length"]
+        file_types = scan["file_types"]
         
         avg_length = total_length / total_units if total_units > 0 else 0
         
@@ -200,10 +338,14 @@ class PlanningAgent(BaseAgent):
         total_units = task_analysis["total_units"]
         avg_length = task_analysis["avg_length"]
         
+        # Token估算与分支无关，提到分支外只算一次
+        # （此前 estimated_tokens 落在分支后重复赋值，tokens_per_unit
+        # 仅在分支内定义，结构一旦变动就有 NameError 风险）
+        tokens_per_unit = avg_length * 2
+        estimated_tokens = total_units * tokens_per_unit
+        
         if not chunk_strategies:
             # 粗略估算（向后兼容）
-            tokens_per_unit = avg_length * 2
-            estimated_tokens = total_units * tokens_per_unit
             api_calls = total_units * 3
             strategy_breakdown = {}
         else:
@@ -214,12 +356,8 @@ class PlanningAgent(BaseAgent):
             num_chunks = len(chunk_strategies)
             api_calls = num_chunks * 3  # 每个chunk：1次翻译 + 1次回译 + 1次修正（如需要）
             
-            # 根据策略统计
-            strategy_counts = {}
-            for chunk_info in chunk_strategies:
-                strategy = chunk_info["strategy"]
-                strategy_counts[strategy] = strategy_counts.get(strategy, 0) + 1
-            
+            # 根据策略统计（Counter 单遍计数）
+            strategy_counts = Counter(chunk_info["strategy"] for chunk_info in chunk_strategies)
             strategy_breakdown = {
                 strategy: {
                     "chunks": count,
@@ -227,10 +365,6 @@ class PlanningAgent(BaseAgent):
                 }
                 for strategy, count in strategy_counts.items()
             }
-            
-            # Token估算（基于平均长度和chunk数）
-            tokens_per_unit = avg_length * 2
-        estimated_tokens = total_units * tokens_per_unit
         
         # DeepSeek价格约 $0.27 / 1M tokens (输入) + $1.1 / 1M tokens (输出)
         # 假设输入:输出 = 1:1.5
@@ -286,11 +420,14 @@ class PlanningAgent(BaseAgent):
             status: 状态（"pending", "running", "completed", "failed"）
             progress: 进度（0.0 - 1.0）
         """
-        self.agent_status[agent_name] = {
-            "status": status,
-            "progress": progress,
-            "updated_at": self._get_current_time()
-        }
+        entry = self.agent_status.get(agent_name)
+        if entry is not None:
+            # 已有条目原地更新，进度条式高频调用不再逐次新建 dict
+            entry.status = status
+            entry.progress = progress
+            entry.updated_at = self._get_current_time()
+        else:
+            self.agent_status[agent_name] = AgentStatus(status, progress, self._get_current_time())
         self.info(f"[{agent_name}] 状态更新: {status} ({progress*100:.1f}%)")
     
     def should_intervene(self, agent_name: str, quality_score: float) -> bool:
@@ -310,14 +447,27 @@ class PlanningAgent(BaseAgent):
             return True
         return False
     
-    def _get_current_time(self) -> str:
-        """获取当前时间戳"""
-        from datetime import datetime
-        return datetime.now().isoformat()
+    def _get_current_time(self) -> int:
+        """获取当前时间戳（单调纳秒整数）
+
+        状态跟踪只用于比较先后，整数单调戳比每次格式化 ISO-8601
+        便宜一个量级；展示时再经 _format_time 转为可读形式
+        """
+        return time.monotonic_ns()
+
+    @staticmethod
+    def _format_time(ns: int) -> str:
+        """把单调纳秒时间戳转为可读的秒表示（仅展示/日志用）"""
+        return f"{ns / 1e9:.3f}s"
     
-    def _analyze_chunks_and_assign_strategies(self, cache_project: CacheProject) -> List[Dict[str, Any]]:
+    def _scan_project(self, cache_project: CacheProject) -> Dict[str, Any]:
         """
-        细粒度分析每个文本块，为每个chunk分配翻译策略
+        单遍流式扫描语料，同步产出两类结果：
+        1. 复杂度统计（total_units / total_length / file_types）
+        2. chunk 策略列表（细粒度分块分析，与TranslationRefinementAgent分块逻辑一致）
+        
+        规划阶段的工作是纯内存访问（属性读取+字符串扫描），瓶颈在字节搬运；
+        三类消费者共用同一趟遍历，每条 source_text 只过一次缓存
         
         分析维度：
         1. 文本长度和复杂度
@@ -331,83 +481,98 @@ class PlanningAgent(BaseAgent):
         - "stylized": 风格化（文学作品、营销文案）
         
         Returns:
-            List of {
-                "chunk_index": 批次索引,
-                "strategy": "literal" | "free" | "stylized",
-                "complexity": "simple" | "medium" | "complex",
-                "style": "formal" | "informal" | "literary",
-                "terminology_density": 0.0-1.0,  # 术语密度
-                "avg_sentence_length": 平均句子长度,
-                "reason": "选择该策略的原因"
+            {
+                "total_units": 总文本单元数,
+                "total_length": 总字符数,
+                "file_types": 文件类型集合,
+                "chunk_strategies": 每个chunk的策略信息列表,
             }
         """
-        from ModuleFolders.Cache.CacheItem import TranslationStatus
-        import re
-        
+        total_units = 0
+        total_length = 0
+        file_types = set()
         chunk_strategies = []
-        chunk_index = 0
         
-        # 获取配置
-        if self.config:
-            limit_type = "token" if getattr(self.config, 'tokens_limit_switch', False) else "line"
-            limit_count = getattr(self.config, 'tokens_limit', 500) if limit_type == "token" else getattr(self.config, 'lines_limit', 15)
-        else:
-            limit_type = "line"
-            limit_count = 15
+        MAX_CHUNK_CHARS = 6000
         
-        # 遍历所有文件
+        # 遍历所有文件（仅此一趟）
         for file_path, cache_file in cache_project.files.items():
-            items = [item for item in cache_file.items if item.translation_status == TranslationStatus.UNTRANSLATED]
-            
-            if not items:
-                continue
-            
-            # 模拟分块逻辑（与TranslationRefinementAgent一致）
-            current_chunk, current_length, chunk_chars = [], 0, 0
-            MAX_CHUNK_CHARS = 6000
+            file_types.add(cache_file.file_project_type)
             
-            for item in items:
-                item_length = item.token_count if limit_type == "token" else 1
-                source_text_length = len(item.source_text)
-                
-                # 🔥 【智能分块策略】
-                is_extreme_long = source_text_length > MAX_CHUNK_CHARS
-                
-                # 极端超长文本单独成chunk
-                if is_extreme_long:
-                    if current_chunk:
-                        strategy_info = self._analyze_chunk_strategy(current_chunk, chunk_index)
-                        chunk_strategies.append(strategy_info)
-                        chunk_index += 1
-                    
-                    strategy_info = self._analyze_chunk_strategy([item], chunk_index)
-                    chunk_strategies.append(strategy_info)
-                    chunk_index += 1
-                    current_chunk, current_length, chunk_chars = [], 0, 0
+            # 收集未翻译条目与长度（顺带累计复杂度统计）
+            # 追加方法绑定为局部名，万条级项目里省去逐条的属性查找
+            items = []
+            lengths = []
+            items_append = items.append
+            lengths_append = lengths.append
+            for item in cache_file.items:
+                if item.translation_status != _UNTRANSLATED:
                     continue
                 
-                # 智能打包：按总字符数限制
-                if current_chunk and (chunk_chars + source_text_length > MAX_CHUNK_CHARS):
-                    strategy_info = self._analyze_chunk_strategy(current_chunk, chunk_index)
-                    chunk_strategies.append(strategy_info)
-                    chunk_index += 1
-                    current_chunk, current_length, chunk_chars = [], 0, 0
+                source_text_length = len(item.source_text)
+                
+                total_units += 1
+                total_length += source_text_length
                 
-                current_chunk.append(item)
-                current_length += item_length
-                chunk_chars += source_text_length
+                items_append(item)
+                lengths_append(source_text_length)
+            
+            if not items:
+                continue
             
-            # 处理最后一个chunk
-            if current_chunk:
-                strategy_info = self._analyze_chunk_strategy(current_chunk, chunk_index)
-                chunk_strategies.append(strategy_info)
-                chunk_index += 1
+            # 🔥 【智能分块策略】向量化切分：
+            # 超长文本单独成chunk，其余区段用累计和+二分定位贪心切点，
+            # Python 层循环次数从 O(条目数) 降为 O(chunk数)
+            # （分块状态按文件重置，结果与逐条打包完全一致）
+            length_arr = np.asarray(lengths, dtype=np.int64)
+            segment_start = 0
+            for extreme_idx in np.flatnonzero(length_arr > MAX_CHUNK_CHARS):
+                extreme_idx = int(extreme_idx)
+                self._pack_segment(items, length_arr, segment_start, extreme_idx,
+                                   MAX_CHUNK_CHARS, chunk_strategies)
+                chunk_strategies.append(
+                    self._analyze_chunk_strategy([items[extreme_idx]], len(chunk_strategies)))
+                segment_start = extreme_idx + 1
+            self._pack_segment(items, length_arr, segment_start, len(items),
+                               MAX_CHUNK_CHARS, chunk_strategies)
+        
+        return {
+            "total_units": total_units,
+            "total_length": total_length,
+            "file_types": file_types,
+            "chunk_strategies": chunk_strategies,
+        }
+    
+    def _pack_segment(self, items: List, length_arr: "np.ndarray", start: int, stop: int,
+                      max_chunk_chars: int, chunk_strategies: List[Dict[str, Any]]) -> None:
+        """贪心打包 [start, stop) 区段（区段内无超长条目）
         
-        return chunk_strategies
+        每个chunk取字符总和不超过 max_chunk_chars 的最长前缀：
+        在区段累计和上用 searchsorted 直接二分出切点
+        """
+        if start >= stop:
+            return
+        csum = length_arr[start:stop].cumsum()
+        base = 0
+        offset = 0
+        n = stop - start
+        analyze = self._analyze_chunk_strategy
+        append = chunk_strategies.append
+        searchsorted = np.searchsorted
+        while offset < n:
+            end = int(searchsorted(csum, base + max_chunk_chars, side='right'))
+            if end <= offset:  # 防御：单条即超限时至少前进一条（正常不会发生）
+                end = offset + 1
+            append(analyze(items[start + offset:start + end], len(chunk_strategies)))
+            base = int(csum[end - 1])
+            offset = end
     
+    # chunk策略缓存容量上限
+    CHUNK_STRATEGY_CACHE_MAX = 10_000
+
     def _analyze_chunk_strategy(self, chunk: List, chunk_index: int) -> Dict[str, Any]:
         """
-        分析单个chunk并决定翻译策略
+        分析单个chunk并决定翻译策略（按内容哈希记忆结果）
         
         Args:
             chunk: CacheItem列表
@@ -416,27 +581,48 @@ class PlanningAgent(BaseAgent):
         Returns:
             策略信息字典
         """
-        import re
-        
         # 收集chunk的所有文本
         texts = [item.source_text for item in chunk]
         combined_text = " ".join(texts)
         
-        # 1. 计算平均句子长度
-        sentences = re.split(r'[.!?。！？]+', combined_text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-        avg_sentence_length = sum(len(s) for s in sentences) / len(sentences) if sentences else 0
+        # 内容哈希命中则直接复用分析结果，只需补上本次的批次索引
+        cache_key = hashlib.blake2b(combined_text.encode(), digest_size=16).hexdigest()
+        cached = self._chunk_strategy_cache.get(cache_key)
+        if cached is not None:
+            return {"chunk_index": chunk_index, **cached}
+        
+        # 1. 计算平均句子长度（无终止符的常见短文本跳过正则切分；
+        # 句数与字符数在同一趟里累计，不再物化句子列表后走两遍）
+        if not any(c in combined_text for c in _TERMINAL_CHARS):
+            pieces = (combined_text,)
+        else:
+            pieces = _SENT_SPLIT_RE.split(combined_text)
+        num_sentences = 0
+        sentence_chars = 0
+        for piece in pieces:
+            piece = piece.strip()
+            if piece:
+                num_sentences += 1
+                sentence_chars += len(piece)
+        avg_sentence_length = sentence_chars / num_sentences if num_sentences else 0
         
         # 2. 计算专业术语密度（简单启发式：大写单词、特殊符号）
-        words = combined_text.split()
-        technical_words = sum(1 for w in words if w and (w[0].isupper() or '_' in w or '-' in w)) if words else 0
-        terminology_density = technical_words / len(words) if words else 0
+        # 两次 C 级扫描（正则计数 + split 计词）替代逐词 Python 循环
+        total_words = len(combined_text.split())
+        technical_words = sum(1 for _ in _TECH_WORD_RE.finditer(combined_text)) if total_words else 0
+        terminology_density = technical_words / total_words if total_words else 0
         
         # 3. 判断文体风格
         formal_indicators = len(re.findall(r'\b(therefore|thus|furthermore|moreover|whereas|hereby)\b', combined_text, re.I))
         informal_indicators = len(re.findall(r'\b(gonna|wanna|yeah|ok|hey)\b', combined_text, re.I))
         literary_indicators = len(re.findall(r'[，。！？—…""''；：]', combined_text))  # 中文标点
         
+        style_indicators = {
+            "formal": formal_indicators,
+            "informal": informal_indicators,
+            "literary": literary_indicators,
+        }
+        
         if formal_indicators > informal_indicators:
             style = "formal"
         elif literary_indicators > len(combined_text) * 0.05:  # 中文标点占比>5%
@@ -466,21 +652,28 @@ class PlanningAgent(BaseAgent):
             strategy = "free"
             reason = f"普通对话或叙述性文本，选择意译策略"
         
-        return {
-            "chunk_index": chunk_index,
+        result = {
             "strategy": strategy,
             "complexity": complexity,
             "style": style,
+            "style_indicators": style_indicators,  # 原始计数，供整体风格指南聚合
             "terminology_density": round(terminology_density, 2),
             "avg_sentence_length": round(avg_sentence_length, 1),
             "reason": reason,
             "text_sample": texts[0][:50] + "..." if texts else ""  # 前50字符作为样本
         }
+        if len(self._chunk_strategy_cache) >= self.CHUNK_STRATEGY_CACHE_MAX:
+            self._chunk_strategy_cache.pop(next(iter(self._chunk_strategy_cache)))
+        self._chunk_strategy_cache[cache_key] = result
+        return {"chunk_index": chunk_index, **result}
     
-    def _determine_style_guide(self, cache_project: CacheProject) -> Dict[str, Any]:
+    def _determine_style_guide(self, chunk_strategies: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         确定整体文体风格指南
         
+        直接聚合 chunk 分析阶段产出的 formal/informal/literary 原始计数，
+        不再对语料样本做第二遍正则扫描
+        
         Returns:
             {
                 "overall_style": "formal" | "informal" | "literary",
@@ -492,21 +685,7 @@ class PlanningAgent(BaseAgent):
                 }
             }
         """
-        from ModuleFolders.Cache.CacheItem import TranslationStatus
-        import re
-        
-        # 收集所有未翻译文本的样本
-        all_texts = []
-        for cache_file in cache_project.files.values():
-            for item in cache_file.items:
-                if item.translation_status == TranslationStatus.UNTRANSLATED:
-                    all_texts.append(item.source_text)
-                    if len(all_texts) >= 50:  # 采样50个文本单元
-                        break
-            if len(all_texts) >= 50:
-                break
-        
-        if not all_texts:
+        if not chunk_strategies:
             return {
                 "overall_style": "informal",
                 "tone": "casual",
@@ -517,12 +696,16 @@ class PlanningAgent(BaseAgent):
                 }
             }
         
-        combined_sample = " ".join(all_texts[:20])  # 只分析前20个
-        
-        # 分析整体风格
-        formal_score = len(re.findall(r'\b(therefore|thus|furthermore|moreover|whereas|hereby)\b', combined_sample, re.I))
-        informal_score = len(re.findall(r'\b(gonna|wanna|yeah|ok|hey)\b', combined_sample, re.I))
-        literary_score = len(re.findall(r'[，。！？—…""''；：]', combined_sample))
+        # 汇总各chunk的指示词计数
+        formal_score = 0
+        informal_score = 0
+        literary_score = 0
+        for chunk_info in chunk_strategies:
+            indicators = chunk_info.get("style_indicators")
+            if indicators:
+                formal_score += indicators["formal"]
+                informal_score += indicators["informal"]
+                literary_score += indicators["literary"]
         
         if formal_score > max(informal_score, literary_score):
             overall_style = "formal"
@@ -8,7 +8,10 @@ from typing import Dict, Any, List
 from .BaseAgent import BaseAgent
 from ModuleFolders.Cache.CacheProject import CacheProject
 from ModuleFolders.Cache.CacheFile import CacheFile
-from ModuleFolders.Cache.CacheItem import CacheItem, TranslationStatus
+
+# 句子切分：模块级一次编译；无任何终止符的文本直接整段返回，不进正则引擎
+_SENT_SPLIT_RE = re.compile(r'[.!?。！？]\s+')
+_TERMINAL_CHARS = '.!?。！？'
 
 
 class PreprocessingAgent(BaseAgent):
@@ -42,6 +45,30 @@ class PreprocessingAgent(BaseAgent):
             "academic": [r"研究表明", r"数据表明", r"综上所述"],
             "colloquial": [r"口语", r"俚语", r"方言"],
         }
+        
+        # 把各类别的所有模式合编成一个带命名分组的交替式，整段语料只扫一遍，
+        # 命中后按分组名前缀归类计数（替代每类别×每模式各自 findall 的多遍扫描）
+        self._domain_re = self._compile_union(self.domain_patterns)
+        self._style_re = self._compile_union(self.style_patterns)
+    
+    @staticmethod
+    def _compile_union(category_patterns: Dict[str, List[str]]) -> "re.Pattern":
+        """将 {类别: [模式...]} 合编为单个命名分组交替式（分组名为 类别__序号）"""
+        return re.compile(
+            "|".join(
+                f"(?P<{category}__{i}>{pattern})"
+                for category, patterns in category_patterns.items()
+                for i, pattern in enumerate(patterns)
+            ),
+            re.IGNORECASE,
+        )
+    
+    @staticmethod
+    def _count_matches(pattern: "re.Pattern", text: str, scores: Dict[str, int]) -> None:
+        """单遍扫描 text，按分组名前缀（类别）把命中次数累加进 scores"""
+        for m in pattern.finditer(text):
+            category = m.lastgroup.split("__", 1)[0]
+            scores[category] = scores.get(category, 0) + 1
     
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -116,78 +143,76 @@ class PreprocessingAgent(BaseAgent):
         """
         文本结构拆解
         确保文本按逻辑单元（段落、逻辑块）切分
+        
+        说明：拆分结果一直不回写 cache_file.items（回写会打乱 text_index
+        与译文的对位关系），因此这里不再为每个长段落实际分配 CacheItem，
+        仅在调试模式下检测并报告存在可拆分长段落的文件
         """
         self.log_agent_action("执行文本结构拆解")
         
+        if not self.is_debug():
+            return
+        
         for file_path, cache_file in cache_project.files.items():
-            # 检查是否已经结构化
-            if cache_file.items:
-                # 检查是否需要进一步拆解长段落
-                new_items = []
-                for item in cache_file.items:
-                    # 如果单个item过长（超过500字符），尝试按句子拆分
-                    if len(item.source_text) > 500:
-                        sentences = self._split_into_sentences(item.source_text)
-                        for idx, sentence in enumerate(sentences):
-                            if sentence.strip():
-                                new_item = CacheItem(
-                                    text_index=item.text_index + idx,
-                                    source_text=sentence.strip(),
-                                    translation_status=TranslationStatus.UNTRANSLATED
-                                )
-                                new_items.append(new_item)
-                    else:
-                        new_items.append(item)
-                
-                # 更新items（这里简化处理，实际可能需要更复杂的逻辑）
-                if len(new_items) != len(cache_file.items):
-                    self.debug(f"文件 {file_path} 进行了进一步结构拆解")
+            for item in cache_file.items:
+                # 单个item过长（超过500字符）且可按句子拆分时提示
+                if len(item.source_text) > 500 and len(self._split_into_sentences(item.source_text)) > 1:
+                    self.debug(f"文件 {file_path} 存在可进一步拆解的长段落")
+                    break
     
     def _split_into_sentences(self, text: str) -> List[str]:
         """将文本按句子拆分"""
         # 简单的句子分割（可以改进为更智能的分割）
-        sentences = re.split(r'[.!?。！？]\s+', text)
+        if not any(c in text for c in _TERMINAL_CHARS):
+            return [text.strip()] if text.strip() else []
+        sentences = _SENT_SPLIT_RE.split(text)
         return [s.strip() for s in sentences if s.strip()]
     
+    # 语域/风格识别的采样上限：信号很快饱和，没必要把几 MB 语料全喂给正则
+    SAMPLE_ITEM_CAP = 200  # 最多采样的文本单元数
+    SAMPLE_CHAR_CAP = 100_000  # 最多采样的字符数
+
     def _identify_domain_and_style(self, cache_project: CacheProject) -> Dict[str, Any]:
         """
-        识别语域和风格
+        识别语域和风格（头部采样，正则只扫描采样文本）
         
         Returns:
             包含domain和style的元数据字典
         """
         self.log_agent_action("执行语域与风格识别")
         
-        # 收集所有文本内容
-        all_text = ""
+        # 流式采样：逐条文本直接过正则并累加计数，不物化样本列表、
+        # 也不再拼接整块采样文本（峰值内存与语料规模解耦）；
+        # 达到条数或字符上限即停
+        domain_scores: Dict[str, int] = {}
+        style_scores: Dict[str, int] = {}
+        sampled_items = 0
+        sampled_chars = 0
         for cache_file in cache_project.files.values():
             for item in cache_file.items:
-                all_text += item.source_text + " "
-        
-        # 识别领域
-        domain_scores = {}
-        for domain, patterns in self.domain_patterns.items():
-            score = sum(len(re.findall(pattern, all_text, re.IGNORECASE)) for pattern in patterns)
-            if score > 0:
-                domain_scores[domain] = score
-        
-        detected_domain = max(domain_scores.items(), key=lambda x: x[1])[0] if domain_scores else "general"
-        
-        # 识别风格
-        style_scores = {}
-        for style, patterns in self.style_patterns.items():
-            score = sum(len(re.findall(pattern, all_text, re.IGNORECASE)) for pattern in patterns)
-            if score > 0:
-                style_scores[style] = score
+                text = item.source_text
+                sampled_items += 1
+                sampled_chars += len(text)
+                self._count_matches(self._domain_re, text, domain_scores)
+                self._count_matches(self._style_re, text, style_scores)
+                if (sampled_items >= self.SAMPLE_ITEM_CAP
+                        or sampled_chars >= self.SAMPLE_CHAR_CAP):
+                    break
+            else:
+                continue
+            break
         
-        detected_style = max(style_scores.items(), key=lambda x: x[1])[0] if style_scores else "neutral"
+        # 识别领域与风格（max(dict, key=dict.get) 免去 items 视图与 lambda）
+        detected_domain = max(domain_scores, key=domain_scores.get) if domain_scores else "general"
+        detected_style = max(style_scores, key=style_scores.get) if style_scores else "neutral"
         
         metadata = {
             "domain": detected_domain,
             "style": detected_style,
             "domain_scores": domain_scores,
             "style_scores": style_scores,
-            "total_text_length": len(all_text)
+            "total_text_length": sampled_chars,  # 实际扫描的采样文本长度
+            "sampled_items": sampled_items,  # 采样的文本单元数（可观测性）
         }
         
         return metadata
@@ -3,10 +3,17 @@
 负责术语识别、知识库集成和全局一致性保障
 """
 
+import hashlib
+import itertools
 import json
 import os
+import random
 import re
-from typing import Dict, Any, List, Optional
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from .BaseAgent import BaseAgent
 from ModuleFolders.NERProcessor.NERProcessor import NERProcessor
@@ -14,6 +21,103 @@ from ModuleFolders.LLMRequester.LLMRequester import LLMRequester
 from ModuleFolders.Cache.CacheProject import CacheProject
 from ModuleFolders.ResponseExtractor.ResponseExtractor import ResponseExtractor
 
+try:
+    import orjson
+    def _load_json(data):
+        """解析 JSON (orjson 比 stdlib 快数倍)"""
+        return orjson.loads(data)
+    def _dump_json_sorted(obj) -> bytes:
+        """按键排序序列化为 bytes（用于缓存键哈希）"""
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    def _load_json(data):
+        """解析 JSON"""
+        return json.loads(data)
+    def _dump_json_sorted(obj) -> bytes:
+        """按键排序序列化为 bytes（用于缓存键哈希）"""
+        return json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+# 译文清理用的预编译正则：这些替换在逐术语的内层循环里执行，
+# 预编译省掉每次 re.sub 查 _compile 缓存（含锁）的开销。
+# 注意保持逐个顺序替换（先粗体后斜体），合并成单个交替式
+# 会改变 **_嵌套_** 这类标记的剥离结果
+_RE_NUM_PREFIX = re.compile(r'^\d+\.\s*')
+_RE_MD_BOLD = re.compile(r'\*\*(.+?)\*\*')
+_RE_MD_ITALIC = re.compile(r'\*(.+?)\*')
+
+# 术语类型 → ES word_type 的映射（循环内只做一次 dict.get）
+_WORD_TYPE_MAP = {
+    "named_entity": "entity",
+    "terminology": "term",
+    "cultural_expression": "idiom",
+    "unknown": "term",
+}
+
+
+class LLMResponseCache:
+    """LLM响应的磁盘缓存（SQLite，按 系统提示+消息+模型 的SHA256精确匹配）
+
+    术语识别/翻译的提示词是确定性的：同一项目重跑或断点续跑时，
+    绝大多数请求与上次完全一致。命中时直接返回上次的响应内容，
+    省掉整次 prefill+decode（秒级 → 毫秒级，费用归零）。
+    注意：只做精确匹配，不做语义相似度召回——批量翻译的响应
+    按行号与请求里的术语顺序一一对应，"相似"批次的响应复用到
+    当前批次会把译文安到错误的术语上。
+    多线程并发访问由进程内锁串行化；任何数据库异常都只由调用方
+    记日志不冒泡——缓存失效时照常发请求
+    """
+
+    DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+    def __init__(self, db_path: str = "llm_response_cache.sqlite",
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # ThreadPoolExecutor 的各工作线程共用同一连接，由 self._lock 串行化
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, created_at INTEGER, response BLOB)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(messages, system_prompt, platform_config) -> str:
+        payload = _dump_json_sorted(
+            {"sys": system_prompt, "msgs": messages,
+             "model": (platform_config or {}).get("model_name")
+                      or (platform_config or {}).get("model")}
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT created_at, response FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        created_at, response = row
+        if time.time() - created_at > self.ttl_seconds:
+            return None
+        return response.decode("utf-8") if isinstance(response, bytes) else response
+
+    def put(self, key: str, response_content: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, created_at, response) VALUES (?, ?, ?)",
+                (key, int(time.time()), response_content),
+            )
+            conn.commit()
+
 
 class TerminologyEntityAgent(BaseAgent):
     """
@@ -24,6 +128,66 @@ class TerminologyEntityAgent(BaseAgent):
     3. 全局一致性控制
     """
     
+    # 🔥 字节级稳定的系统提示词（类常量）：
+    # 领域、行数等随批次变化的内容一律放进用户消息，
+    # 保证并行各chunk的系统前缀完全一致，命中服务商的前缀缓存
+    SYSTEM_PROMPT_IDENTIFY = """你是一位专业的术语识别专家。请从用户给出的文本中识别：
+1. 领域术语：专业或领域特有的词汇和短语（用户消息中会注明文本所属领域）
+2. 文化负载词：缺乏直接对等表达的词汇和习语
+
+注意：
+- 只识别真正需要固定翻译的术语（如专有名词、专业术语）
+- 不要识别普通词汇
+- 优先识别出现频率高的术语
+
+请以JSON格式返回识别结果，格式如下：
+{
+    "terms": [
+        {
+            "term": "术语原文",
+            "category": "domain_term" 或 "cultural_expression",
+            "context": "出现上下文",
+            "meaning": "语义解释",
+            "translation_strategy": "直译/意译/语义补偿"
+        }
+    ]
+}"""
+
+    SYSTEM_PROMPT_ENRICH = """你是一位专业的术语翻译专家。你的任务是为用户给出的术语提供准确的中文翻译。
+
+【翻译要求】
+1. 根据术语的类型选择合适的翻译策略：
+   - 专有名词（人名、地名）：音译为主
+   - 生物/化学术语：使用标准学术译名
+   - 普通术语：意译，符合中文习惯
+2. 翻译必须准确、规范，符合专业领域的惯例
+3. 不要添加任何解释或注释
+
+【输出格式要求】
+- 必须使用<textarea>标签包裹所有译文
+- 逐行翻译，译文行数必须与原文行数完全一致（具体行数见用户消息）
+- 每行格式：序号. 译文
+- 序号必须从1开始连续递增，不要跳过
+- 不要合并行，不要添加额外说明
+
+格式示例：
+<textarea>
+1.第一个术语的译文
+2.第二个术语的译文
+3.第三个术语的译文
+</textarea>"""
+
+    # 单个chunk的LLM请求最大尝试次数与退避上限（秒）：
+    # 429/超时在底层requester里表现为 skip=True 或异常，
+    # 直接丢弃整批术语太浪费，指数退避后重试
+    MAX_LLM_ATTEMPTS = 3
+    RETRY_BACKOFF_CAP = 20.0
+
+    # TASK_UPDATE事件的最小发送间隔（秒）：并行识别时每次LLM调用
+    # 至少触发3次事件（活跃数+1、token更新、活跃数-1），不限流会
+    # 形成UI事件风暴并加剧 atomic_scope 锁竞争
+    EMIT_MIN_INTERVAL = 0.1
+
     def __init__(self, config=None):
         super().__init__(
             name="TerminologyEntityAgent",
@@ -49,6 +213,12 @@ class TerminologyEntityAgent(BaseAgent):
         # 🔥 用于token统计
         self._current_cache_project = None
         
+        # 🔥 LLM响应磁盘缓存：重跑/续跑时命中相同提示词直接复用响应
+        self._response_cache = LLMResponseCache()
+        
+        # 🔥 TASK_UPDATE限流时间戳（monotonic；多线程下的竞态最多多发一次事件，无害）
+        self._last_emit_ts = 0.0
+        
         # 🆕 语言到NER模型的映射
         self.language_model_map = {
             "japanese": "ja_core_news_md",
@@ -71,6 +241,7 @@ class TerminologyEntityAgent(BaseAgent):
         import time
         
         # 🔥 使用atomic_scope确保线程安全
+        emit_now = self._should_emit()
         with self._current_cache_project.stats_data.atomic_scope():
             # 🔥 更新总token数（prompt + completion）
             if prompt_tokens or completion_tokens:
@@ -86,11 +257,23 @@ class TerminologyEntityAgent(BaseAgent):
             # 🔥 更新已消耗时间（与原TaskExecutor保持一致）
             self._current_cache_project.stats_data.time = time.time() - self._current_cache_project.stats_data.start_time
             
-            # 🔥 立即发送UI更新事件，确保token统计实时更新
-            stats_dict = self._current_cache_project.stats_data.to_dict()
+            # 🔥 发送UI更新事件（限流内跳过，连快照都不做）
+            stats_dict = self._current_cache_project.stats_data.to_dict() if emit_now else None
         
         # 在atomic_scope外发送事件
-        self.emit(Base.EVENT.TASK_UPDATE, stats_dict)
+        if stats_dict is not None:
+            self.emit(Base.EVENT.TASK_UPDATE, stats_dict)
+    
+    def _should_emit(self, force: bool = False) -> bool:
+        """TASK_UPDATE限流：距上次发送不足 EMIT_MIN_INTERVAL 时跳过
+        
+        force=True 用于请求收尾等必须让UI看到最终状态的时刻
+        """
+        now = time.monotonic()
+        if force or now - self._last_emit_ts >= self.EMIT_MIN_INTERVAL:
+            self._last_emit_ts = now
+            return True
+        return False
     
     def _llm_request_with_tracking(self, messages, system_prompt, platform_config):
         """
@@ -99,29 +282,61 @@ class TerminologyEntityAgent(BaseAgent):
         Returns:
             (skip, response_think, response_content, prompt_tokens, completion_tokens)
         """
+        # 🔥 磁盘缓存命中时直接短路，既不发请求也不计活跃调用
+        cache_key = None
+        if getattr(self.config, 'enable_llm_cache', True):
+            try:
+                cache_key = LLMResponseCache.make_key(messages, system_prompt, platform_config)
+                cached_content = self._response_cache.get(cache_key)
+                if cached_content is not None:
+                    self.debug("LLM响应缓存命中，跳过请求")
+                    return False, "", cached_content, 0, 0
+            except Exception as e:
+                self.debug(f"LLM响应缓存读取失败（忽略）: {e}")
+                cache_key = None
+        
         if not self._current_cache_project or not self._current_cache_project.stats_data:
-            return self.llm_requester.sent_request(messages, system_prompt, platform_config)
+            result = self.llm_requester.sent_request(messages, system_prompt, platform_config)
+            self._store_response_cache(cache_key, result)
+            return result
         
         from Base.Base import Base
         
         try:
-            # 🔥 调用前：增加活跃LLM调用计数并立即发送事件
+            # 🔥 调用前：增加活跃LLM调用计数（事件走限流通道）
+            emit_now = self._should_emit()
             with self._current_cache_project.stats_data.atomic_scope():
                 self._current_cache_project.stats_data.active_llm_calls += 1
-                stats_dict = self._current_cache_project.stats_data.to_dict()
-            self.emit(Base.EVENT.TASK_UPDATE, stats_dict)
+                stats_dict = self._current_cache_project.stats_data.to_dict() if emit_now else None
+            if stats_dict is not None:
+                self.emit(Base.EVENT.TASK_UPDATE, stats_dict)
             
             # 执行LLM请求
             result = self.llm_requester.sent_request(messages, system_prompt, platform_config)
             
+            self._store_response_cache(cache_key, result)
             return result
         finally:
-            # 🔥 调用后：减少活跃LLM调用计数并立即发送事件
+            # 🔥 调用后：减少活跃LLM调用计数；收尾必须发送（force），
+            # 否则限流可能吞掉最后一次更新，UI停在过期的活跃数上
+            self._should_emit(force=True)
             with self._current_cache_project.stats_data.atomic_scope():
                 self._current_cache_project.stats_data.active_llm_calls = max(0, self._current_cache_project.stats_data.active_llm_calls - 1)
                 stats_dict = self._current_cache_project.stats_data.to_dict()
             self.emit(Base.EVENT.TASK_UPDATE, stats_dict)
     
+    def _store_response_cache(self, cache_key: Optional[str], result: Tuple) -> None:
+        """把成功的LLM响应写入磁盘缓存（skip或空响应不缓存）"""
+        if cache_key is None:
+            return
+        skip, _, response_content = result[0], result[1], result[2]
+        if skip or not response_content:
+            return
+        try:
+            self._response_cache.put(cache_key, response_content)
+        except Exception as e:
+            self.debug(f"LLM响应缓存写入失败（忽略）: {e}")
+    
     def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行术语识别和一致性保障任务
@@ -296,45 +511,55 @@ class TerminologyEntityAgent(BaseAgent):
         """
         self.log_agent_action("使用LLM识别领域术语和文化负载词")
         
-        # 🔥 直接使用智能分块工具方法（与翻译agent完全相同的逻辑）
-        chunks = self._smart_chunk_by_chars(items_data, max_chars=6000, get_text_func=lambda x: x["source_text"])
-        
-        if len(chunks) > 1:
-            self.info(f"  文本较多（{len(items_data)}条），智能分块为 {len(chunks)} 批，并行识别...")
-        
-        # 🔥 【并行处理】使用线程池并行识别所有批次
+        # 🔥 【并行处理】流式分块 + 边分块边提交：
+        # 第一批chunk刚产出就进入线程池发请求，分块耗时被首批网络往返覆盖。
+        # 总批数在分块结束前未知，worker日志不带总数（total_chunks传0）
+        # 说明：沿用线程池而非asyncio——LLM调用是纯I/O，线程在等待响应时
+        # 释放GIL，瓶颈在服务商侧并发额度而非线程开销；LLMRequester底层的
+        # 各家SDK均为同步接口，翻译/润色agent也都走线程池，保持同一套
+        # 重试与统计路径
         all_terms = []
-        
-        if len(chunks) == 1:
-            # 只有1批，直接串行处理
-            all_terms = self._identify_chunk_terms(chunks[0], 1, len(chunks), domain)
-        else:
-            # 多批并行处理
-            with ThreadPoolExecutor(max_workers=min(len(chunks), 5)) as executor:
-                # 提交所有任务
-                future_to_chunk = {
-                    executor.submit(self._identify_chunk_terms, chunk, idx, len(chunks), domain): idx
-                    for idx, chunk in enumerate(chunks, 1)
-                }
-                
-                # 收集结果
-                for future in as_completed(future_to_chunk):
-                    chunk_idx = future_to_chunk[future]
-                    try:
-                        chunk_terms = future.result()
-                        all_terms.extend(chunk_terms)
-                    except Exception as e:
-                        self.error(f"第 {chunk_idx} 批术语识别失败: {e}", e)
-        
-        # 去重（基于术语名称）
-        unique_terms = {}
+        total_chunks = 0
+        
+        # 🔥 并发数跟随配置的实际线程数（由RPM限额/llama.cpp slots/用户设置
+        # 推导，见 TaskConfig.thread_counts_setting），与翻译agent一致，
+        # 不再硬编码5
+        max_workers = (getattr(self.config, 'actual_thread_counts', 0) if self.config else 0) or 5
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_chunk = {}
+            for idx, chunk in enumerate(
+                self._iter_smart_chunks_by_chars(items_data, max_chars=6000,
+                                                 get_text_func=lambda x: x["source_text"]),
+                1,
+            ):
+                future_to_chunk[executor.submit(
+                    self._identify_chunk_terms, chunk, idx, 0, domain
+                )] = idx
+                total_chunks = idx
+            
+            if total_chunks > 1:
+                self.info(f"  文本较多（{len(items_data)}条），智能分块为 {total_chunks} 批，并行识别...")
+            
+            # 收集结果
+            for future in as_completed(future_to_chunk):
+                chunk_idx = future_to_chunk[future]
+                try:
+                    chunk_terms = future.result()
+                    all_terms.extend(chunk_terms)
+                except Exception as e:
+                    self.error(f"第 {chunk_idx} 批术语识别失败: {e}", e)
+        
+        # 去重（基于术语名称）：setdefault 单次探查即可保留首见项；
+        # casefold 比 lower 多覆盖德语ß等非ASCII大小写折叠
+        unique_terms: Dict[str, Dict] = {}
         for term in all_terms:
-            term_name = term.get("term", "").lower()
-            if term_name and term_name not in unique_terms:
-                unique_terms[term_name] = term
+            term_name = (term.get("term") or "").casefold()
+            if term_name:
+                unique_terms.setdefault(term_name, term)
         
         final_terms = list(unique_terms.values())
-        if len(chunks) > 1:
+        if total_chunks > 1:
             self.info(f"✓ 并行识别完成，总计识别到 {len(final_terms)} 个独立术语（去重后）")
         
         return final_terms
@@ -353,47 +578,49 @@ class TerminologyEntityAgent(BaseAgent):
             识别到的术语列表
         """
         # 构建提示词（取每个item的前200字符）
-        sample_texts = [item["source_text"][:200] for item in chunk]
+        # 先在chunk内对原文去重——游戏脚本里重复的UI字符串很常见，
+        # 重复样本只会浪费prompt token
+        sample_texts = [text[:200] for text in dict.fromkeys(item["source_text"] for item in chunk)]
         sample_text = "\n---\n".join(sample_texts)
         
-        system_prompt = f"""你是一位专业的术语识别专家。请从以下文本中识别：
-1. 领域术语：专业或领域特有的词汇和短语（如"{domain}"领域的专业术语）
-2. 文化负载词：缺乏直接对等表达的词汇和习语
-
-注意：
-- 只识别真正需要固定翻译的术语（如专有名词、专业术语）
-- 不要识别普通词汇
-- 优先识别出现频率高的术语
-
-请以JSON格式返回识别结果，格式如下：
-{{
-    "terms": [
-        {{
-            "term": "术语原文",
-            "category": "domain_term" 或 "cultural_expression",
-            "context": "出现上下文",
-            "meaning": "语义解释",
-            "translation_strategy": "直译/意译/语义补偿"
-        }}
-    ]
-}}"""
+        # 🔥 空白/无有效文字的chunk直接跳过，省一次完整的LLM往返
+        # （如纯空白、纯符号的版权页和分隔文件）
+        if getattr(self.config, 'skip_trivial_chunks', True):
+            stripped = sample_text.strip()
+            if len(stripped) < 50 or not any(ch.isalpha() for ch in stripped):
+                self.debug(f"第 {chunk_idx} 批样本过短或无有效文字，跳过LLM识别")
+                return []
         
+        # 系统提示词为类常量，领域信息放进用户消息，保持前缀可缓存
         messages = [{
             "role": "user",
-            "content": f"请识别以下文本中的领域术语和文化负载词：\n\n{sample_text}"
+            "content": f"文本领域：{domain}\n\n请识别以下文本中的领域术语和文化负载词：\n\n{sample_text}"
         }]
         
-        # 调用LLM
+        # 调用LLM（失败时指数退避重试，而不是直接丢弃整批）
         try:
             platform_config = self.config.get_platform_configuration("translationReq") if self.config else {}
-            skip, _, response_content, prompt_tokens, completion_tokens = self._llm_request_with_tracking(
-                messages=messages,
-                system_prompt=system_prompt,
-                platform_config=platform_config
-            )
-            
-            # 🔥 更新token统计
-            self._update_token_stats(prompt_tokens, completion_tokens)
+            skip, response_content = True, ""
+            for attempt in range(1, self.MAX_LLM_ATTEMPTS + 1):
+                try:
+                    skip, _, response_content, prompt_tokens, completion_tokens = self._llm_request_with_tracking(
+                        messages=messages,
+                        system_prompt=self.SYSTEM_PROMPT_IDENTIFY,
+                        platform_config=platform_config
+                    )
+                    # 🔥 更新token统计
+                    self._update_token_stats(prompt_tokens, completion_tokens)
+                except Exception as e:
+                    skip = True
+                    self.warning(f"第 {chunk_idx} 批请求异常: {e}")
+                
+                if not skip:
+                    break
+                if attempt < self.MAX_LLM_ATTEMPTS:
+                    # 指数退避加随机抖动，避免并行worker同时重试
+                    delay = min(self.RETRY_BACKOFF_CAP, (2 ** attempt) + random.uniform(0, 1))
+                    self.warning(f"第 {chunk_idx} 批识别失败（第{attempt}次尝试），{delay:.1f}秒后重试")
+                    time.sleep(delay)
             
             if not skip and response_content:
                 # 解析JSON响应
@@ -402,7 +629,7 @@ class TerminologyEntityAgent(BaseAgent):
                     json_end = response_content.rfind("}") + 1
                     if json_start >= 0 and json_end > json_start:
                         json_str = response_content[json_start:json_end]
-                        result = json.loads(json_str)
+                        result = _load_json(json_str)
                         
                         chunk_terms = []
                         for term_info in result.get("terms", []):
@@ -418,10 +645,14 @@ class TerminologyEntityAgent(BaseAgent):
                         
                         if total_chunks > 1:
                             self.info(f"  ✓ 第 {chunk_idx}/{total_chunks} 批识别到 {len(chunk_terms)} 个术语")
+                        elif total_chunks <= 0:
+                            # 流式分块时总批数未知
+                            self.info(f"  ✓ 第 {chunk_idx} 批识别到 {len(chunk_terms)} 个术语")
                         
                         return chunk_terms
                         
-                except json.JSONDecodeError:
+                except ValueError:
+                    # ValueError 同时覆盖 json.JSONDecodeError 和 orjson.JSONDecodeError
                     self.warning(f"第 {chunk_idx} 批LLM返回的JSON格式不正确")
         except Exception as e:
             self.error(f"第 {chunk_idx} 批LLM术语识别失败: {e}", e)
@@ -451,42 +682,60 @@ class TerminologyEntityAgent(BaseAgent):
             # 分块术语列表（术语较短，可以设置更大的batch）
             batches = _smart_chunk_by_chars(terms_list, 3000, lambda x: x.get("term", ""))
         """
-        chunks = []
-        current_chunk = []
-        chunk_chars = 0
-        
-        for item in items:
-            text = get_text_func(item)
-            text_length = len(text)
-            
-            # 🔥 极端超长文本（超过max_chars）单独成chunk
-            if text_length > max_chars:
-                # 先提交当前chunk（如果有）
-                if current_chunk:
-                    chunks.append(current_chunk)
-                    current_chunk = []
-                    chunk_chars = 0
-                
-                # 极端超长文本单独成chunk
-                chunks.append([item])
-                continue
-            
-            # 🔥 智能打包：按总字符数限制
-            # 如果加入当前item会超过max_chars，先提交当前chunk
-            if current_chunk and (chunk_chars + text_length > max_chars):
-                chunks.append(current_chunk)
-                current_chunk = []
-                chunk_chars = 0
-            
-            # 添加当前item到chunk
-            current_chunk.append(item)
-            chunk_chars += text_length
+        return list(self._iter_smart_chunks_by_chars(items, max_chars, get_text_func))
+    
+    def _iter_smart_chunks_by_chars(self, items, max_chars: int, get_text_func):
+        """🔥 分块逻辑的流式版本：逐个产出chunk
         
-        # 处理最后一个chunk
-        if current_chunk:
-            chunks.append(current_chunk)
+        调用方可以边分块边提交LLM请求（见 _identify_terminology_with_llm），
+        把分块耗时隐藏在第一批请求的网络往返里；
+        需要一次性拿全部chunk的场景用 _smart_chunk_by_chars
         
-        return chunks
+        边界规划走numpy向量化（与PlanningAgent._pack_segment同一套
+        cumsum+searchsorted贪心）：超长项单独成chunk，其余按前缀和
+        一次二分定出每个chunk的右边界，Python层不再逐项累加比较
+        """
+        if not isinstance(items, list):
+            items = list(items)
+        if not items:
+            return
+        
+        lengths = np.fromiter(
+            (len(get_text_func(item)) for item in items),
+            dtype=np.int64, count=len(items),
+        )
+        
+        # 🔥 极端超长文本（超过max_chars）单独成chunk，前后两段各自贪心打包
+        start = 0
+        for oversize_idx in np.flatnonzero(lengths > max_chars):
+            oversize_idx = int(oversize_idx)
+            yield from self._iter_packed_segment(items, lengths, start, oversize_idx, max_chars)
+            yield [items[oversize_idx]]
+            start = oversize_idx + 1
+        yield from self._iter_packed_segment(items, lengths, start, len(items), max_chars)
+    
+    @staticmethod
+    def _iter_packed_segment(items, lengths, start: int, stop: int, max_chars: int):
+        """把 items[start:stop]（均不超长）按总字符数贪心切块并逐个产出
+        
+        searchsorted(side='right') 找到第一个使前缀和超过 base+max_chars
+        的位置，即当前chunk的右开边界——与逐项累加"装不下就换新chunk"
+        的结果逐项一致
+        """
+        if start >= stop:
+            return
+        csum = lengths[start:stop].cumsum()
+        searchsorted = np.searchsorted
+        total = stop - start
+        offset = 0
+        base = 0
+        while offset < total:
+            end = int(searchsorted(csum, base + max_chars, side='right'))
+            if end <= offset:  # 理论上不会触发（超长项已剔除），保底防死循环
+                end = offset + 1
+            yield items[start + offset:start + end]
+            base = int(csum[end - 1])
+            offset = end
     
     def _verify_and_enrich_terminology(self, terminology_results: List[Dict]) -> List[Dict]:
         """
@@ -559,32 +808,10 @@ class TerminologyEntityAgent(BaseAgent):
             context = term_info.get("context", "")[:50]  # 只取前50字符
             terms_text.append(f"{idx}. {term}")
         
-        system_prompt = f"""你是一位专业的术语翻译专家。你的任务是为以下术语提供准确的中文翻译。
-
-【翻译要求】
-1. 根据术语的类型选择合适的翻译策略：
-   - 专有名词（人名、地名）：音译为主
-   - 生物/化学术语：使用标准学术译名
-   - 普通术语：意译，符合中文习惯
-2. 翻译必须准确、规范，符合专业领域的惯例
-3. 不要添加任何解释或注释
-
-【输出格式要求】
-- 必须使用<textarea>标签包裹所有译文
-- 逐行翻译，原文有{len(terms_list)}行，译文也必须有{len(terms_list)}行
-- 每行格式：序号. 译文
-- 序号必须从1到{len(terms_list)}连续，不要跳过
-- 不要合并行，不要添加额外说明
-
-格式示例：
-<textarea>
-1.第一个术语的译文
-2.第二个术语的译文
-3.第三个术语的译文
-</textarea>"""
-        
-        # 构建用户消息
-        user_content = "请为以下术语提供准确的中文翻译：\n\n<textarea>\n" + "\n".join(terms_text) + "\n</textarea>"
+        # 构建用户消息（行数说明随批次变化，放在用户消息里；系统提示词保持字节稳定）
+        user_content = (f"请为以下{len(terms_list)}个术语提供准确的中文翻译"
+                        f"（原文共{len(terms_list)}行，译文也必须是{len(terms_list)}行）：\n\n<textarea>\n"
+                        + "\n".join(terms_text) + "\n</textarea>")
         
         messages = [{
             "role": "user",
@@ -595,7 +822,7 @@ class TerminologyEntityAgent(BaseAgent):
             platform_config = self.config.get_platform_configuration("translationReq") if self.config else {}
             skip, _, response_content, prompt_tokens, completion_tokens = self._llm_request_with_tracking(
                 messages=messages,
-                system_prompt=system_prompt,
+                system_prompt=self.SYSTEM_PROMPT_ENRICH,
                 platform_config=platform_config
             )
             
@@ -614,11 +841,11 @@ class TerminologyEntityAgent(BaseAgent):
                         translation = translation_dict.get(str(idx), "")
                         
                         # 清理序号前缀（如 "1." 或 "1. "）
-                        translation = re.sub(r'^\d+\.\s*', '', translation).strip()
+                        translation = _RE_NUM_PREFIX.sub('', translation).strip()
                         
                         # 清理Markdown标记
-                        translation = re.sub(r'\*\*(.+?)\*\*', r'\1', translation)
-                        translation = re.sub(r'\*(.+?)\*', r'\1', translation)
+                        translation = _RE_MD_BOLD.sub(r'\1', translation)
+                        translation = _RE_MD_ITALIC.sub(r'\1', translation)
                         translation = translation.strip('*_').strip()
                         
                         if translation:
@@ -637,77 +864,6 @@ class TerminologyEntityAgent(BaseAgent):
         # 如果批量查证失败，返回原始信息
         return terms_list
     
-    def _enrich_term_with_llm(self, term_info: Dict) -> Dict:
-        """
-        ⚠️ 已弃用：使用LLM丰富单个术语信息
-        现在使用 _batch_enrich_terms_with_llm 进行批量处理
-        保留此方法以防后续需要单独查证某些术语
-        """
-        term = term_info.get("term")
-        category = term_info.get("category", "unknown")
-        
-        system_prompt = f"""你是一位专业的术语翻译专家。请为以下术语提供：
-1. 准确的翻译建议
-2. 使用场景说明
-3. 翻译策略建议
-
-术语：{term}
-类别：{category}"""
-        
-        messages = [{
-            "role": "user",
-            "content": f"请为术语'{term}'提供翻译建议和说明。"
-        }]
-        
-        try:
-            platform_config = self.config.get_platform_configuration("translationReq") if self.config else {}
-            skip, _, response_content, prompt_tokens, completion_tokens = self._llm_request_with_tracking(
-                messages=messages,
-                system_prompt=system_prompt,
-                platform_config=platform_config
-            )
-            
-            # 🔥 更新token统计
-            self._update_token_stats(prompt_tokens, completion_tokens)
-            
-            if not skip and response_content:
-                # 解析响应，提取翻译建议
-                # 这里简化处理，实际可以更智能地解析
-                term_info["llm_verification"] = response_content
-                term_info["translation_suggestions"] = self._extract_translation_suggestions(response_content)
-        except Exception as e:
-            self.error(f"术语查证失败 {term}: {e}", e)
-        
-        return term_info
-    
-    def _extract_translation_suggestions(self, llm_response: str) -> List[str]:
-        """
-        从LLM响应中提取翻译建议
-        ✅ 清理所有Markdown格式标记（**，__，*，_等）
-        """
-        import re
-        suggestions = []
-        # 简单的提取逻辑
-        lines = llm_response.split("\n")
-        for line in lines:
-            if "翻译" in line or "译" in line:
-                # 尝试提取可能的翻译
-                parts = line.split("：") or line.split(":")
-                if len(parts) > 1:
-                    translation = parts[1].strip()
-                    # ✅ 清理Markdown格式标记
-                    # 移除粗体：**text** 或 __text__
-                    translation = re.sub(r'\*\*(.+?)\*\*', r'\1', translation)
-                    translation = re.sub(r'__(.+?)__', r'\1', translation)
-                    # 移除斜体：*text* 或 _text_
-                    translation = re.sub(r'\*(.+?)\*', r'\1', translation)
-                    translation = re.sub(r'_(.+?)_', r'\1', translation)
-                    # 移除行首行尾的多余空格和标点
-                    translation = translation.strip('*_').strip()
-                    if translation:
-                        suggestions.append(translation)
-        return suggestions[:3]  # 返回前3个建议
-    
     def _build_terminology_database(self, verified_terminology: List[Dict]) -> None:
         """
         构建项目专属术语库（结构化资源）
@@ -742,17 +898,24 @@ class TerminologyEntityAgent(BaseAgent):
             # 获取当前 work_id (默认 0)
             work_id = getattr(self._current_cache_project, 'db_work_id', 0)
             
-            # 批量写入术语到 ES（包含完整词汇信息）
+            # 收集相关原子ID：展平结果与具体术语无关，在循环外算一次即可
+            # （原先每个术语都重新遍历整个 db_atom_map，O(术语数×原子数)）
+            atom_ids = list(itertools.islice(
+                itertools.chain.from_iterable(
+                    atom_map.values()
+                    for atom_map in getattr(self._current_cache_project, 'db_atom_map', {}).values()
+                ),
+                10,  # 限制数量避免过大
+            ))
+            
+            # 批量写入术语到 ES（包含完整词汇信息）：
+            # 先在循环里组装参数字典（纯CPU），再用一次bulk请求写入，
+            # 避免逐条 upsert_term 产生 N 次HTTP往返
+            domain = self.memory_storage.get("domain", "general")
+            term_entries = []
             for term, info in self.terminology_db.items():
                 # 确定词汇类型
-                term_type = info.get("type", "term")
-                word_type_map = {
-                    "named_entity": "entity",
-                    "terminology": "term",
-                    "cultural_expression": "idiom",
-                    "unknown": "term"
-                }
-                word_type = word_type_map.get(term_type, "term")
+                word_type = _WORD_TYPE_MAP.get(info.get("type", "term"), "term")
                 
                 # 构建候选译法列表
                 translations_list = []
@@ -766,22 +929,12 @@ class TerminologyEntityAgent(BaseAgent):
                         "rationale": info.get("translation_strategy", "")
                     })
                 
-                # 收集相关原子ID（如果有的话）
-                atom_ids = []
-                if hasattr(self._current_cache_project, 'db_atom_map'):
-                    # 遍历所有文件的 atom_map，找出包含这个术语的原子
-                    for file_path, atom_map in self._current_cache_project.db_atom_map.items():
-                        for row_idx, a_id in atom_map.items():
-                            atom_ids.append(a_id)
-                    # 限制数量避免过大
-                    atom_ids = atom_ids[:10] if len(atom_ids) > 10 else atom_ids
-                
-                db_manager.upsert_term(
+                term_entries.append(dict(
                     entry_key=term,
                     entry_val=main_translation,
                     work_id=work_id,
                     word_type=word_type,
-                    domain=self.memory_storage.get("domain", "general"),
+                    domain=domain,
                     variants=[],  # TODO: 还没提取变体
                     example_sentences=[info.get("context", "")] if info.get("context") else [],
                     translations=translations_list,
@@ -789,7 +942,14 @@ class TerminologyEntityAgent(BaseAgent):
                     confidence=info.get("confidence", 1.0),
                     agent_notes=f"类型: {info.get('category', '')}, 含义: {info.get('meaning', '')}",
                     is_confirmed=info.get("verified", False)
-                )
+                ))
+            
+            success_count = db_manager.upsert_terms_bulk(term_entries)
+            if not success_count and term_entries:
+                # bulk整体失败时退回逐条写入，尽量保住数据
+                self.warning("[DB] 批量写入失败，退回逐条upsert")
+                for entry in term_entries:
+                    db_manager.upsert_term(**entry)
             
             self.info(f"[DB] 术语已同步到 ElasticSearch: {len(self.terminology_db)} 个条目 (Project ID: {work_id})")
             
@@ -20,7 +20,8 @@ from ModuleFolders.TaskConfig.TaskConfig import TaskConfig
 from griptape.structures import Workflow, Agent
 from griptape.tasks import ToolkitTask, PromptTask
 from griptape.drivers import OpenAiChatPromptDriver
-from openai import OpenAI
+
+from .GriptapeAgents import _get_openai_client
 
 
 class WorkflowManager(Base):
@@ -55,12 +56,9 @@ class WorkflowManager(Base):
         api_key = platform_config.get("api_key", "")
         model_name = platform_config.get("model_name", "deepseek-chat")
         
-        # 创建OpenAI客户端（兼容DeepSeek等OpenAI兼容的API）
-        client = OpenAI(
-            api_key=api_key if api_key else "none",
-            base_url=api_url
-        )
-        
+        # 复用OpenAI客户端（兼容DeepSeek等OpenAI兼容的API）
+        client = _get_openai_client(api_url, api_key)
+
         # 创建Prompt Driver
         prompt_driver = OpenAiChatPromptDriver(
             model=model_name,
@@ -81,12 +79,9 @@ class WorkflowManager(Base):
         api_key = platform_config.get("api_key", "")
         model_name = platform_config.get("model_name", "deepseek-chat")
         
-        # 创建OpenAI客户端（兼容DeepSeek等OpenAI兼容的API）
-        client = OpenAI(
-            api_key=api_key if api_key else "none",
-            base_url=api_url
-        )
-        
+        # 复用OpenAI客户端（兼容DeepSeek等OpenAI兼容的API）
+        client = _get_openai_client(api_url, api_key)
+
         # 创建Prompt Driver
         # 注意：新版本的OpenAiChatPromptDriver可能不支持top_p参数
         prompt_driver = OpenAiChatPromptDriver(
@@ -131,9 +131,9 @@ def init_postgres():
                 atom_id SERIAL PRIMARY KEY,
                 doc_id INTEGER REFERENCES source_docs(doc_id) ON DELETE CASCADE,
                 
-                -- 原文信息
+                -- 原文信息 (source_hash 由服务端生成，客户端无须计算/传输)
                 source_text TEXT NOT NULL,
-                source_hash VARCHAR(64),
+                source_hash VARCHAR(64) GENERATED ALWAYS AS (md5(source_text)) STORED,
                 position INTEGER DEFAULT 0,
                 
                 -- 翻译结果
@@ -227,9 +227,9 @@ def init_postgres():
                 content TEXT NOT NULL,
                 kb_type VARCHAR(50) NOT NULL,
                 
-                -- 向量 (用于RAG检索)
-                semantic_vec vector(768),
-                
+                -- 向量 (用于RAG检索; halfvec 半精度，存储/带宽减半，ANN 召回几乎无损)
+                semantic_vec halfvec(768),
+
                 -- 元数据
                 meta_tags JSONB DEFAULT '{}',
                 source_ref TEXT,
@@ -248,14 +248,15 @@ def init_postgres():
         print("[INFO] 创建索引...")
         
         # 业务索引
-        cur.execute("CREATE INDEX idx_atoms_doc ON processing_atoms(doc_id);")
+        cur.execute("CREATE INDEX idx_atoms_doc ON processing_atoms(doc_id) INCLUDE (status_code, quality_score);")
         cur.execute("CREATE INDEX idx_atoms_status ON processing_atoms(status_code);")
         cur.execute("CREATE INDEX idx_atoms_position ON processing_atoms(position);")
+        # 去重查询用 (同一文档内允许重复原文，故不加唯一约束)
+        cur.execute("CREATE INDEX idx_atoms_hash ON processing_atoms(doc_id, source_hash);")
         cur.execute("CREATE INDEX idx_traces_atom ON agent_traces(atom_id);")
         cur.execute("CREATE INDEX idx_traces_active ON agent_traces(atom_id, is_active) WHERE is_active = TRUE;")
         cur.execute("CREATE INDEX idx_docs_work ON source_docs(work_id);")
-        cur.execute("CREATE INDEX idx_kb_work ON knowledge_base(work_id);")
-        cur.execute("CREATE INDEX idx_kb_type ON knowledge_base(kb_type);")
+        cur.execute("CREATE INDEX idx_kb_work_type ON knowledge_base(work_id, kb_type);")
         
         # 向量索引 (仅在有数据后才有效)
         try:
@@ -263,10 +264,19 @@ def init_postgres():
                 CREATE INDEX atoms_vec_idx 
                 ON processing_atoms USING ivfflat (semantic_vec vector_cosine_ops) WITH (lists = 100);
             """)
+            # 全量 HNSW 索引：search_knowledge 不带 kb_type 过滤时也能走 ANN
             cur.execute("""
-                CREATE INDEX kb_vec_idx 
-                ON knowledge_base USING ivfflat (semantic_vec vector_cosine_ops) WITH (lists = 100);
+                CREATE INDEX kb_hnsw_all
+                ON knowledge_base USING hnsw (semantic_vec halfvec_cosine_ops);
             """)
+            # 每种知识类型再加一个局部 HNSW 索引，带 kb_type 过滤的检索
+            # 用更小的局部索引，召回/延迟更优
+            for kb_type in ('tm', 'glossary', 'style_guide', 'external'):
+                cur.execute(f"""
+                    CREATE INDEX kb_hnsw_{kb_type}
+                    ON knowledge_base USING hnsw (semantic_vec halfvec_cosine_ops)
+                    WHERE kb_type = '{kb_type}';
+                """)
         except Exception as e:
             print(f"[INFO] 向量索引创建跳过 (表为空时正常): {e}")
 
@@ -297,6 +307,11 @@ def init_elasticsearch():
         # domain_lexicon (术语库索引)
         # 论文4.4.3: 词汇表格式设计
         lexicon_mapping = {
+            # 单节点部署：无副本；translog 阈值调大以利批量导入
+            "settings": {
+                "number_of_replicas": 0,
+                "translog.flush_threshold_size": "1gb"
+            },
             "mappings": {
                 "properties": {
                     # 术语基本信息